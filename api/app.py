@@ -10,12 +10,17 @@ from datetime import datetime
 
 # Add parent directory to path to import github_scraper
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from github_scraper import GithubScraper
+from github_scraper import get_shared_scraper, TransientHostError, RateLimitError
+from deadline import Deadline, DeadlineExceeded
+from request_coalescing import SingleFlight
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds a request may spend scraping before it gives up with a 504
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '25'))
+
 app = Flask(__name__)
 CORS(app)
 
@@ -53,14 +58,17 @@ def log_request_info():
     logger.info(f"Request Info: {json.dumps(request_info, indent=2)}")
     return request_info
 
-# Initialize scraper with logging
+# Initialize the shared scraper with logging; it is reused by every request
 try:
-    scraper = GithubScraper()
+    scraper = get_shared_scraper()
     logger.info("GithubScraper initialized successfully")
 except Exception as e:
     logger.error(f"Error initializing GithubScraper: {str(e)}")
     scraper = None
 
+# Merges concurrent scrapes of the same canonical URL into one upstream fetch
+inflight = SingleFlight()
+
 @app.route('/')
 def index():
     """Root endpoint"""
@@ -83,73 +91,110 @@ def health_check():
         'status': 'healthy',
         'message': 'Service is running',
         'environment': env_info,
+        'connections': scraper.connection_stats() if scraper else None,
+        'extraction': scraper.extraction_stats() if scraper else None,
+        'cache': scraper.cache_stats() if scraper else None,
+        'negative_cache': scraper.negative_cache_stats() if scraper else None,
+        'coalescing': inflight.stats(),
         'timestamp': datetime.utcnow().isoformat()
     })
 
+def empty_stackoverflow_response(stackoverflow_url, cache_log):
+    """The /scrape/stackoverflow response for a profile nothing could be read from"""
+    return {
+        'stackoverflow_url': stackoverflow_url,
+        'github_url': None,
+        'name': None,
+        'company': None,
+        'location': None,
+        'email': None,
+        'bio': None,
+        'repositories': None,
+        'followers': None,
+        'following': None,
+        'contributions': None,
+        'pinned_repositories': None,
+        'stackoverflow_info': None,
+        'cache': cache_log
+    }
+
+def build_stackoverflow_response(stackoverflow_url, deadline):
+    """Scrape a Stack Overflow profile and its GitHub profile into the /scrape/stackoverflow response"""
+    # Profiles an earlier request found to lead nowhere are not fetched again
+    outcome = scraper.dead_end(stackoverflow_url)
+    if outcome:
+        return dict(empty_stackoverflow_response(stackoverflow_url, {}), reason=outcome)
+    
+    # Fetch the Stack Overflow profile once for both the GitHub link and the stats
+    with scraper.track_cache() as cache_log:
+        so_profile = scraper.get_stackoverflow_profile(stackoverflow_url, deadline=deadline)
+    so_info = so_profile.get('stackoverflow_info') if so_profile else None
+    if not so_info:
+        return empty_stackoverflow_response(stackoverflow_url, cache_log)
+        
+    # Extract GitHub URL from Stack Overflow info
+    github_url = so_info.get('github_url')
+    if not github_url:
+        github_url = so_profile.get('github_url')
+        
+    github_info = None
+    if github_url and not scraper.dead_end(github_url):
+        with scraper.track_cache(cache_log):
+            _, github_info = scraper.get_github_info(github_url, deadline=deadline)
+        
+    response = {
+        'stackoverflow_url': stackoverflow_url,
+        'github_url': github_url,
+        'name': github_info.get('name') if github_info else so_info.get('name'),
+        'company': github_info.get('company') if github_info else None,
+        'location': github_info.get('location') if github_info else so_info.get('location'),
+        'email': github_info.get('email') if github_info else None,
+        'bio': github_info.get('bio') if github_info else so_info.get('bio'),
+        'repositories': github_info.get('repositories') if github_info else None,
+        'followers': github_info.get('followers') if github_info else None,
+        'following': github_info.get('following') if github_info else None,
+        'contributions': github_info.get('contributions') if github_info else None,
+        'pinned_repositories': github_info.get('pinned_repositories') if github_info else None,
+        'stackoverflow_info': {
+            'reputation': so_info.get('stats', {}).get('reputation'),
+            'reached': so_info.get('stats', {}).get('reached'),
+            'answers': so_info.get('stats', {}).get('answers'),
+            'questions': so_info.get('stats', {}).get('questions'),
+            'website': so_info.get('website'),
+            'twitter': so_profile.get('twitter_url'),
+            'blog': so_info.get('blog')
+        },
+        'cache': cache_log
+    }
+    
+    return response
+
+
 @app.route('/scrape/stackoverflow', methods=['POST'])
 @limiter.limit("2 per minute")
 def scrape_stackoverflow():
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS)
     try:
         data = request.get_json()
         if not data or 'stackoverflow_url' not in data:
             return jsonify({'error': 'Missing stackoverflow_url parameter'}), 400
 
-        scraper = GithubScraper()
-        
-        # Get Stack Overflow info first
-        so_info = scraper.get_stackoverflow_info(data['stackoverflow_url'])
-        if not so_info:
-            return jsonify({
-                'stackoverflow_url': data['stackoverflow_url'],
-                'github_url': None,
-                'name': None,
-                'company': None,
-                'location': None,
-                'email': None,
-                'bio': None,
-                'repositories': None,
-                'followers': None,
-                'following': None,
-                'contributions': None,
-                'pinned_repositories': None,
-                'stackoverflow_info': None
-            }), 200
-            
-        # Extract GitHub URL from Stack Overflow info
-        github_url = so_info.get('github')
-        if not github_url:
-            github_url = scraper.get_github_link(data['stackoverflow_url'])
-            
-        github_info = None
-        if github_url:
-            github_info = scraper.get_github_info(github_url)
-            
-        response = {
-            'stackoverflow_url': data['stackoverflow_url'],
-            'github_url': github_url,
-            'name': github_info.get('name') if github_info else so_info.get('name'),
-            'company': github_info.get('company') if github_info else None,
-            'location': github_info.get('location') if github_info else so_info.get('location'),
-            'email': github_info.get('email') if github_info else None,
-            'bio': github_info.get('bio') if github_info else so_info.get('bio'),
-            'repositories': github_info.get('repositories') if github_info else None,
-            'followers': github_info.get('followers') if github_info else None,
-            'following': github_info.get('following') if github_info else None,
-            'contributions': github_info.get('contributions') if github_info else None,
-            'pinned_repositories': github_info.get('pinned_repositories') if github_info else None,
-            'stackoverflow_info': {
-                'reputation': so_info.get('stats', {}).get('reputation'),
-                'reached': so_info.get('stats', {}).get('reached'),
-                'answers': so_info.get('stats', {}).get('answers'),
-                'questions': so_info.get('stats', {}).get('questions'),
-                'website': so_info.get('website'),
-                'twitter': so_info.get('twitter'),
-                'blog': so_info.get('blog')
-            }
-        }
+        if not scraper:
+            return jsonify({'error': 'Scraper not properly initialized'}), 500
         
-        return jsonify(response), 200
+        # Concurrent requests for the same profile share one scrape
+        response, coalesced = inflight.do(
+            ('stackoverflow', scraper.canonical_url(data['stackoverflow_url'])),
+            lambda: build_stackoverflow_response(data['stackoverflow_url'], deadline)
+        )
+        return jsonify(dict(response, stackoverflow_url=data['stackoverflow_url'], coalesced=coalesced)), 200
 
+    except DeadlineExceeded as e:
+        logger.error(f"Deadline exceeded in /scrape/stackoverflow: {str(e)}")
+        return jsonify({'error': str(e)}), 504
+    except TransientHostError as e:
+        logger.warning(f"Upstream temporarily unavailable in /scrape/stackoverflow: {str(e)}")
+        return jsonify({'error': str(e)}), 429 if isinstance(e, RateLimitError) else 503
     except Exception as e:
         logger.error(f"Error in /scrape/stackoverflow: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -158,6 +203,7 @@ def scrape_stackoverflow():
 @limiter.limit("2 per minute")
 def scrape_github():
     """Scrape comprehensive profile information from GitHub profile"""
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS)
     try:
         log_environment()
         request_info = log_request_info()
@@ -177,9 +223,22 @@ def scrape_github():
         github_url = data['github_url']
         logger.info(f"Processing GitHub URL: {github_url}")
         
+        outcome = scraper.dead_end(github_url)
+        if outcome:
+            return jsonify({'status': 'error', 'message': "No information found for this GitHub profile", 'reason': outcome}), 404
+        
         # Get profile information
         try:
-            profile_info = scraper.get_github_info(github_url)
+            def fetch_github_profile():
+                with scraper.track_cache() as cache_log:
+                    _, profile_info = scraper.get_github_info(github_url, deadline=deadline)
+                return profile_info, cache_log
+            
+            # Concurrent requests for the same profile share one fetch
+            (profile_info, cache_log), coalesced = inflight.do(
+                ('github', scraper.canonical_url(github_url)),
+                fetch_github_profile
+            )
             if not profile_info:
                 error_msg = "Failed to retrieve profile information"
                 logger.error(error_msg)
@@ -204,9 +263,17 @@ def scrape_github():
                         'contributions': profile_info.get('contributions'),
                         'pinned_repositories': profile_info.get('pinned_repositories', [])
                     }
-                }
+                },
+                'cache': cache_log,
+                'coalesced': coalesced
             })
             
+        except DeadlineExceeded as e:
+            logger.error(f"Deadline exceeded: {str(e)}")
+            return jsonify({'status': 'error', 'message': str(e)}), 504
+        except TransientHostError as e:
+            logger.warning(f"Upstream temporarily unavailable: {str(e)}")
+            return jsonify({'status': 'error', 'message': str(e)}), 429 if isinstance(e, RateLimitError) else 503
         except Exception as e:
             error_msg = f"Error getting GitHub info: {str(e)}"
             logger.error(error_msg)
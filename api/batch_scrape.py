@@ -1,11 +1,24 @@
 from http.server import BaseHTTPRequestHandler
 import os
+import socket
+import sys
+import uuid
 from supabase import create_client, Client
-from .github import GithubScraper
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from github_scraper import get_shared_scraper, TransientHostError, MIN_FETCH_BUDGET
+from deadline import Deadline, DeadlineExceeded
+from request_coalescing import RunMemo
+from stackoverflow_urls import normalize_stackoverflow_url, stackoverflow_user_id
 import json
+import threading
 from typing import Optional
+from urllib.parse import urlparse, parse_qs
 
 BATCH_SIZE = 40
+# Seconds an invocation may spend scraping before it stops and returns partial results
+BATCH_DEADLINE_SECONDS = float(os.getenv('BATCH_DEADLINE_SECONDS', '50'))
+# Seconds a claimed batch stays reserved for its worker without a heartbeat
+CLAIM_LEASE_SECONDS = int(os.getenv('CLAIM_LEASE_SECONDS', '120'))
 
 # Initialize Supabase client
 supabase: Optional[Client] = None
@@ -40,47 +53,133 @@ def get_counter() -> int:
         print(f"Error getting counter: {e}")
         return 0
 
-def update_counter(value: int, processed_urls: list):
-    """Update counter and log processed URLs in Supabase"""
+def profile_status(result: dict) -> Optional[str]:
+    """Map a scrape result to the stackoverflow_profiles status it finishes with, or None if it stays queued.
+
+    Only a Stack Overflow page that was fetched and parsed without a GitHub
+    link counts as no_github; fetch failures are deferred by the callers and
+    never reach a final status.
+    """
+    status = result.get("status")
+    if status == "deferred":
+        return None
+    if status == "success":
+        return "done"
+    if status == "no_github_profile" or (status == "skipped" and result.get("reason") == "no_github_link"):
+        return "no_github"
+    return "failed"
+
+def complete_urls(worker_id: str, statuses: dict) -> int:
+    """Set the final status of worker_id's finished URLs, log them and advance the shared counter in one call.
+
+    statuses maps each URL as claimed to its status. Returns the new counter.
+    """
     init_supabase()
     try:
-        # Update progress first
-        supabase.table("scraping_progress").update({
-            "current_index": value,
-            "last_updated": "now()"
-        }).eq("id", 1).execute()
-        
-        # Then insert all processed URLs in one go
-        if processed_urls:
-            data = [{
-                "stackoverflow_url": url,
-                "batch_index": value,
-                "processed_at": "now()"
-            } for url in processed_urls]
-            
-            supabase.table("processed_urls").upsert(data).execute()
-            
+        # The counter is incremented in the database so concurrent workers don't overwrite each other
+        result = supabase.rpc('complete_urls', {
+            'worker_id': worker_id,
+            'results': [{"url": url, "status": status} for url, status in statuses.items()]
+        }).execute()
+        return result.data or 0
     except Exception as e:
         print(f"Error updating counter: {e}")
         raise
 
-def get_urls() -> list:
-    """Get next batch of unprocessed URLs"""
+def new_worker_id() -> str:
+    """Return an identifier for one worker invocation to hold its claims under"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+def claim_urls(worker_id: str, batch_size: int = BATCH_SIZE, after_id: Optional[int] = None) -> tuple:
+    """Claim the next batch of unprocessed URLs for worker_id; no other worker gets them while the lease lasts.
+
+    Claims start after row id after_id, or by default at the shared queue
+    cursor, which the claim advances. Returns (urls, last_id); pass last_id
+    back as after_id to claim the following page.
+    """
     init_supabase()
     try:
-        result = supabase.rpc('get_unprocessed_urls').execute()
+        result = supabase.rpc('claim_urls', {
+            'worker_id': worker_id,
+            'batch_size': batch_size,
+            'lease_seconds': CLAIM_LEASE_SECONDS,
+            'after_id': after_id
+        }).execute()
         urls = [row.get('url') for row in result.data if row.get('url')]
-        print(f"Found {len(urls)} unprocessed URLs")
-        return urls
+        last_id = max((row.get('id') for row in result.data), default=after_id)
+        print(f"Worker {worker_id} claimed {len(urls)} URLs")
+        return urls, last_id
+    except Exception as e:
+        print(f"Error claiming URLs: {e}")
+        return [], after_id
+
+def extend_leases(worker_id: str, lease_seconds: int = CLAIM_LEASE_SECONDS) -> int:
+    """Renew the leases worker_id holds; return how many were renewed"""
+    init_supabase()
+    result = supabase.rpc('extend_leases', {'worker_id': worker_id, 'lease_seconds': lease_seconds}).execute()
+    return result.data or 0
+
+def release_claims(worker_id: str):
+    """Release whatever worker_id still holds so unfinished URLs can be claimed again"""
+    init_supabase()
+    try:
+        supabase.rpc('release_claims', {'worker_id': worker_id}).execute()
+    except Exception as e:
+        # The leases run out on their own
+        print(f"Error releasing claims for {worker_id}: {e}")
+
+class LeaseHeartbeat:
+    """Keeps a worker's claims alive from a background thread while it scrapes its batch"""
+
+    def __init__(self, worker_id: str, lease_seconds: int = CLAIM_LEASE_SECONDS):
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = max(1, lease_seconds / 3)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                extend_leases(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Error extending leases for {self.worker_id}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+def get_urls(after_id: int = 0, batch_size: int = BATCH_SIZE) -> tuple:
+    """Get the next page of unprocessed URLs whose row id is above after_id.
+
+    Returns (urls, last_id); pass last_id back as after_id for the following page.
+    """
+    init_supabase()
+    try:
+        result = supabase.rpc('get_unprocessed_urls', {'after_id': after_id, 'batch_size': batch_size}).execute()
+        urls = [row.get('url') for row in result.data if row.get('url')]
+        last_id = max((row.get('id') for row in result.data), default=after_id)
+        print(f"Found {len(urls)} unprocessed URLs after id {after_id}")
+        return urls, last_id
     except Exception as e:
         print(f"Error getting unprocessed URLs: {e}")
-        return []
+        return [], after_id
 
 def is_url_processed(so_url: str) -> bool:
-    """Check if URL has been processed"""
+    """Check if URL has been processed, matching profile URLs by Stack Overflow user id"""
     init_supabase()
     try:
-        result = supabase.table("processed_urls").select("id").eq("stackoverflow_url", so_url).execute()
+        query = supabase.table("processed_urls").select("id")
+        user_id = stackoverflow_user_id(so_url)
+        if user_id is not None:
+            query = query.eq("so_user_id", user_id)
+        else:
+            query = query.eq("stackoverflow_url", so_url)
+        result = query.execute()
         return bool(result.data)
     except Exception as e:
         print(f"Error checking processed URL: {e}")
@@ -96,131 +195,223 @@ def batch_check_processed_urls(urls: list) -> set:
         print(f"Error batch checking URLs: {e}")
         return set()
 
-def save_profile(so_url: str, github_url: str = None, email: str = None, profile_data: dict = None, so_description: str = None, twitter_url: str = None):
-    """Save profile data to Supabase"""
+def profile_row(so_url: str, github_url: str = None, email: str = None, profile_data: dict = None, so_description: str = None, twitter_url: str = None) -> dict:
+    """Build the github_profiles row for a scraped profile"""
+    profile_data = profile_data or {}
+    return {
+        "stackoverflow_url": so_url,
+        "github_url": github_url,
+        "stackoverflow_description": so_description,
+        "twitter_url": twitter_url,
+        "email": email,
+        "name": profile_data.get("name"),
+        "username": profile_data.get("username"),
+        "location": profile_data.get("location"),
+        "company": profile_data.get("company"),
+        "website": profile_data.get("website"),
+        "followers": profile_data.get("followers"),
+        "following": profile_data.get("following"),
+        "bio": profile_data.get("bio"),
+        "contributions": profile_data.get("contributions"),
+        "raw_data": json.dumps(profile_data) if profile_data else None
+    }
+
+def save_profiles(rows: list):
+    """Upsert github_profiles rows in a single request"""
+    if not rows:
+        return
     init_supabase()
     try:
-        profile_data = profile_data or {}
-        profile_data = {
-            "stackoverflow_url": so_url,
-            "github_url": github_url,
-            "stackoverflow_description": so_description,
-            "twitter_url": twitter_url,
-            "email": email,
-            "name": profile_data.get("name"),
-            "username": profile_data.get("username"),
-            "location": profile_data.get("location"),
-            "company": profile_data.get("company"),
-            "website": profile_data.get("website"),
-            "followers": profile_data.get("followers"),
-            "following": profile_data.get("following"),
-            "bio": profile_data.get("bio"),
-            "contributions": profile_data.get("contributions"),
-            "raw_data": json.dumps(profile_data) if profile_data else None
-        }
         # Use upsert instead of insert to handle duplicates
         supabase.table("github_profiles").upsert(
-            profile_data,
+            rows,
             on_conflict="stackoverflow_url"
         ).execute()
     except Exception as e:
-        print(f"Error saving profile: {e}")
+        print(f"Error saving {len(rows)} profiles: {e}")
         raise
 
+def save_profile(so_url: str, github_url: str = None, email: str = None, profile_data: dict = None, so_description: str = None, twitter_url: str = None):
+    """Save profile data to Supabase"""
+    save_profiles([profile_row(so_url, github_url, email, profile_data, so_description, twitter_url)])
+
+class ProfileBatchWriter:
+    """Collects the profile rows of a batch so they are written together.
+
+    add() takes the same arguments as save_profile. Rows for a Stack Overflow
+    URL seen before are merged into the earlier one, later non-empty values
+    winning, so a Twitter-only row followed by the full profile becomes a
+    single row. flush() upserts all rows in one request and then finishes the
+    batch's URLs with complete_urls.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.added = 0
+        self.merged = 0
+
+    def add(self, so_url: str, github_url: str = None, email: str = None, profile_data: dict = None, so_description: str = None, twitter_url: str = None):
+        row = profile_row(so_url, github_url, email, profile_data, so_description, twitter_url)
+        with self._lock:
+            self.added += 1
+            existing = self._rows.get(so_url)
+            if existing is None:
+                self._rows[so_url] = row
+                return
+            self.merged += 1
+            existing.update({key: value for key, value in row.items() if value is not None})
+
+    def flush(self, worker_id: str, statuses: dict):
+        """Write the collected profiles, then the status of each finished URL and the progress counter.
+
+        Returns the new counter, or None when no URL was finished.
+        """
+        with self._lock:
+            rows = list(self._rows.values())
+            self._rows = {}
+        # Profiles first, so a failed write leaves their URLs unprocessed for a retry
+        save_profiles(rows)
+        if statuses:
+            return complete_urls(worker_id, statuses)
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'rows_added': self.added, 'rows_merged': self.merged}
+
 class Handler(BaseHTTPRequestHandler):
     def do_GET(self):
+        deadline = Deadline(BATCH_DEADLINE_SECONDS)
+        counter = None
         try:
-            # Get current position
-            counter = get_counter()
-            urls = get_urls()
+            # ?after_id=N pages through the queue from row id N instead of the shared cursor
+            query = parse_qs(urlparse(self.path).query)
+            after_id = int(query['after_id'][0]) if query.get('after_id') else None
             
-            if counter >= len(urls):
+            # Claim a batch of our own so concurrent workers never share URLs
+            worker_id = new_worker_id()
+            batch_urls, last_id = claim_urls(worker_id, after_id=after_id)
+            
+            if not batch_urls:
                 self.send_response(200)
                 self.send_header('Content-type', 'application/json')
                 self.end_headers()
                 self.wfile.write(json.dumps({
                     "message": "All profiles processed",
-                    "total_processed": counter
+                    "total_processed": get_counter()
                 }).encode())
                 return
             
             # Process batch
-            end_idx = min(counter + BATCH_SIZE, len(urls))
-            batch_urls = urls[counter:end_idx]
-            processed_urls = []
             results = []
-            scraper = GithubScraper()
+            scraper = get_shared_scraper()
+            memo = RunMemo()
+            # Profile rows are written in one upsert when the batch is done
+            writer = ProfileBatchWriter()
             
             try:
-                # Batch check processed URLs
-                processed_set = batch_check_processed_urls(batch_urls)
-                
-                for so_url in batch_urls:
-                    try:
-                        # Ensure URL starts with https://
-                        if not so_url.startswith('http'):
-                            so_url = f"https://{so_url}"
-                        
-                        # Check if URL has already been processed
-                        if so_url in processed_set:
-                            results.append({
-                                "stackoverflow_url": so_url,
-                                "status": "already_processed"
-                            })
-                            processed_urls.append(so_url)  # Still count as processed for counter update
-                            continue
-                        
-                        # Get GitHub profile and Stack Overflow details
-                        github_url, so_description, twitter_url, profile_text = scraper.get_github_link(so_url)
+                # Renew our leases in the background until the batch is saved
+                with LeaseHeartbeat(worker_id):
+                    for so_url in batch_urls:
+                        if deadline.expired(MIN_FETCH_BUDGET):
+                            # Out of time: releasing the claims leaves the rest for the next invocation
+                            break
                         
-                        # Check if Twitter URL is Stack Overflow's profile
-                        if twitter_url and twitter_url.lower().strip('/') == 'https://twitter.com/stackoverflow':
-                            twitter_url = None
-                        
-                        # Save profile if we found a Twitter URL, even without GitHub
-                        if twitter_url:
-                            save_profile(so_url, None, None, None, so_description, twitter_url)
-                        
-                        if not github_url:
+                        try:
+                            # Key the profile by its Stack Overflow user id
+                            so_url = normalize_stackoverflow_url(so_url)
+                            
+                            # Skip profiles an earlier run found to lead nowhere
+                            outcome = scraper.dead_end(so_url)
+                            if outcome:
+                                results.append({
+                                    "stackoverflow_url": so_url,
+                                    "status": "skipped",
+                                    "reason": outcome
+                                })
+                                continue
+                            
+                            # Get GitHub profile and Stack Overflow details
+                            github_url, so_description, twitter_url, profile_text = scraper.get_github_link(so_url, deadline=deadline, raise_errors=True)
+                            
+                            # Check if Twitter URL is Stack Overflow's profile
+                            if twitter_url and twitter_url.lower().strip('/') == 'https://twitter.com/stackoverflow':
+                                twitter_url = None
+                            
+                            # Save profile if we found a Twitter URL, even without GitHub
+                            if twitter_url:
+                                writer.add(so_url, None, None, None, so_description, twitter_url)
+                            
+                            if not github_url:
+                                results.append({
+                                    "stackoverflow_url": so_url,
+                                    "status": "no_github_profile",
+                                    "stackoverflow_description": so_description,
+                                    "twitter_url": twitter_url
+                                })
+                                continue
+                            
+                            outcome = scraper.dead_end(github_url)
+                            if outcome:
+                                results.append({
+                                    "stackoverflow_url": so_url,
+                                    "github_url": github_url,
+                                    "status": "skipped",
+                                    "reason": outcome
+                                })
+                                continue
+                            
+                            # Get GitHub info and save profile
+                            try:
+                                email, profile = scraper.get_github_info(github_url, deadline=deadline, memo=memo, raise_errors=True)
+                                writer.add(so_url, github_url, email, profile, so_description, twitter_url)
+                                
+                                results.append({
+                                    "stackoverflow_url": so_url,
+                                    "github_url": github_url,
+                                    "stackoverflow_description": so_description,
+                                    "twitter_url": twitter_url,
+                                    "status": "success"
+                                })
+                            except (TransientHostError, DeadlineExceeded):
+                                raise
+                            except ValueError as e:
+                                results.append({
+                                    "stackoverflow_url": so_url,
+                                    "status": "error",
+                                    "error": f"Error getting GitHub profile: {str(e)}"
+                                })
+                                
+                        except (TransientHostError, DeadlineExceeded) as e:
+                            # Host is rate limiting us, its circuit is open or we ran out of time
                             results.append({
                                 "stackoverflow_url": so_url,
-                                "status": "no_github_profile",
-                                "stackoverflow_description": so_description,
-                                "twitter_url": twitter_url
+                                "status": "deferred",
+                                "error": str(e)
                             })
-                            processed_urls.append(so_url)
-                            continue
-                        
-                        # Get GitHub info and save profile
-                        try:
-                            email, profile = scraper.get_github_info(github_url)
-                            save_profile(so_url, github_url, email, profile, so_description, twitter_url)
-                            
+                        except ValueError as e:
+                            # Profile not found or known to lead nowhere
                             results.append({
                                 "stackoverflow_url": so_url,
-                                "github_url": github_url,
-                                "stackoverflow_description": so_description,
-                                "twitter_url": twitter_url,
-                                "status": "success"
+                                "status": "error",
+                                "error": str(e)
                             })
-                            processed_urls.append(so_url)
                         except Exception as e:
+                            # Not a verdict on the profile, so it goes back to the queue
                             results.append({
                                 "stackoverflow_url": so_url,
-                                "status": "error",
-                                "error": f"Error saving profile: {str(e)}"
+                                "status": "deferred",
+                                "error": str(e)
                             })
-                            
-                    except Exception as e:
-                        results.append({
-                            "stackoverflow_url": so_url,
-                            "status": "error",
-                            "error": str(e)
-                        })
-                
-                # Update counter if we processed any URLs
-                if processed_urls:
-                    update_counter(end_idx, processed_urls)
+                    
+                    # Save the batch's profiles, then each finished URL's status and the counter
+                    statuses = {}
+                    for claimed_url, result in zip(batch_urls, results):
+                        status = profile_status(result)
+                        if status:
+                            statuses[claimed_url] = status
+                    counter = writer.flush(worker_id, statuses)
             except Exception as e:
                 self.send_response(500)
                 self.send_header('Content-type', 'application/json')
@@ -230,14 +421,26 @@ class Handler(BaseHTTPRequestHandler):
                     "current_index": counter
                 }).encode())
                 return
+            finally:
+                # Unfinished URLs go back to the queue; processed ones are excluded from claims anyway
+                release_claims(worker_id)
             
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
             self.end_headers()
             self.wfile.write(json.dumps({
-                "start_index": counter,
-                "end_index": end_idx,
-                "processed": len([result for result in results if result.get("status") != "error"]),
+                "worker_id": worker_id,
+                "claimed": len(batch_urls),
+                "last_id": last_id,
+                "current_index": counter,
+                "processed": len([result for result in results if result.get("status") not in ("error", "deferred")]),
+                "deadline_reached": deadline.expired(MIN_FETCH_BUDGET),
+                "connections": scraper.connection_stats(),
+                "extraction": scraper.extraction_stats(),
+                "github_memo": memo.stats(),
+                "profile_writes": writer.stats(),
+                "cache": scraper.cache_stats(),
+                "negative_cache": scraper.negative_cache_stats(),
                 "results": results
             }).encode())
             
@@ -3,126 +3,172 @@ import requests
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from github_scraper import GithubScraper
-from .batch_scrape import get_counter, get_urls, batch_check_processed_urls, update_counter, save_profile
+from github_scraper import get_shared_scraper, TransientHostError, MIN_FETCH_BUDGET
+from deadline import Deadline, DeadlineExceeded
+from request_coalescing import RunMemo
+from stackoverflow_urls import normalize_stackoverflow_url
+from .batch_scrape import (
+    get_counter, save_profile, ProfileBatchWriter, profile_status,
+    new_worker_id, claim_urls, release_claims, LeaseHeartbeat
+)
 import json
 
 BATCH_SIZE = 40
+# Seconds a cron invocation may spend scraping before it returns partial results
+BATCH_DEADLINE_SECONDS = float(os.getenv('BATCH_DEADLINE_SECONDS', '50'))
+
+def process_url(scraper, so_url, deadline, memo=None, writer=None):
+    """Scrape and save a single Stack Overflow profile.
+
+    Returns (result, processed) where processed tells whether the URL counts
+    towards the progress counter. URLs whose host is rate limiting us or has an
+    open circuit, or that could not be finished before the deadline, are
+    reported as deferred and left for a later run, as are unexpected fetch
+    failures; a 404 or a known dead end is final.
+    
+    Profiles go to writer (a ProfileBatchWriter) when given, otherwise they
+    are saved right away.
+    """
+    save = writer.add if writer else save_profile
+    try:
+        # Key the profile by its Stack Overflow user id
+        so_url = normalize_stackoverflow_url(so_url)
+        
+        # Skip profiles an earlier run found to lead nowhere
+        outcome = scraper.dead_end(so_url)
+        if outcome:
+            return {
+                "stackoverflow_url": so_url,
+                "status": "skipped",
+                "reason": outcome
+            }, True
+        
+        try:
+            # Get GitHub profile and Stack Overflow details
+            github_url, so_description, twitter_url, profile_text = scraper.get_github_link(so_url, deadline=deadline, raise_errors=True)
+            
+            # Skip Stack Overflow's official Twitter
+            if twitter_url and twitter_url.lower().strip('/') == 'https://twitter.com/stackoverflow':
+                twitter_url = None
+            
+            # Save profile with Twitter URL, even without GitHub
+            if twitter_url:
+                save(so_url, None, None, None, so_description, twitter_url)
+            
+            # If no GitHub URL, mark as processed and continue
+            if not github_url:
+                return {
+                    "stackoverflow_url": so_url,
+                    "status": "no_github_profile",
+                    "stackoverflow_description": so_description,
+                    "twitter_url": twitter_url
+                }, True
+            
+            outcome = scraper.dead_end(github_url)
+            if outcome:
+                return {
+                    "stackoverflow_url": so_url,
+                    "github_url": github_url,
+                    "status": "skipped",
+                    "reason": outcome
+                }, True
+            
+            # Get GitHub info and save complete profile
+            email, profile = scraper.get_github_info(github_url, deadline=deadline, memo=memo, raise_errors=True)
+            save(so_url, github_url, email, profile, so_description, twitter_url)
+            
+            return {
+                "stackoverflow_url": so_url,
+                "github_url": github_url,
+                "email": email,
+                "status": "success",
+                "stackoverflow_description": so_description,
+                "twitter_url": twitter_url
+            }, True
+        except (TransientHostError, DeadlineExceeded) as e:
+            # Leave it unprocessed so the next run picks it up again
+            print(f"Deferring {so_url}: {e}")
+            return {
+                "stackoverflow_url": so_url,
+                "status": "deferred",
+                "error": str(e)
+            }, False
+        except ValueError as e:
+            return {
+                "stackoverflow_url": so_url,
+                "status": "error",
+                "error": str(e)
+            }, True
+        except Exception as e:
+            # Not a verdict on the profile, so it stays queued
+            print(f"Deferring {so_url} after unexpected error: {e}")
+            return {
+                "stackoverflow_url": so_url,
+                "status": "deferred",
+                "error": str(e)
+            }, False
+            
+    except Exception as e:
+        return {
+            "stackoverflow_url": so_url,
+            "status": "error",
+            "error": str(e)
+        }, True
 
 def process_batch():
-    """Process a batch of Stack Overflow profiles"""
+    """Claim and process a batch of Stack Overflow profiles"""
+    deadline = Deadline(BATCH_DEADLINE_SECONDS)
+    counter = None
+    worker_id = new_worker_id()
     try:
-        # Get current position and URLs
-        counter = get_counter()
-        urls = get_urls()
+        # Claim URLs no other worker holds
+        batch_urls, last_id = claim_urls(worker_id, BATCH_SIZE)
         
-        if not urls:
+        if not batch_urls:
             return {
                 "message": "No more unprocessed profiles found",
-                "total_processed": counter
+                "total_processed": get_counter()
             }
         
-        # Process batch
-        batch_urls = urls[:BATCH_SIZE]  # Take next batch
-        processed_urls = []
+        statuses = {}
         results = []
-        scraper = GithubScraper()
+        scraper = get_shared_scraper()
+        memo = RunMemo()
+        writer = ProfileBatchWriter()
         
-        # Batch check processed URLs
-        processed_set = batch_check_processed_urls(batch_urls)
-        
-        for so_url in batch_urls:
-            try:
-                # Ensure URL starts with https://
-                if not so_url.startswith('http'):
-                    so_url = f"https://{so_url}"
-                
-                # Skip if already processed
-                if so_url in processed_set:
-                    results.append({
-                        "stackoverflow_url": so_url,
-                        "status": "already_processed"
-                    })
-                    processed_urls.append(so_url)
-                    continue
-                
-                try:
-                    # Get GitHub profile and Stack Overflow details
-                    github_url, so_description, twitter_url, profile_text = scraper.get_github_link(so_url)
-                    
-                    # Skip Stack Overflow's official Twitter
-                    if twitter_url and twitter_url.lower().strip('/') == 'https://twitter.com/stackoverflow':
-                        twitter_url = None
-                    
-                    # Save profile with Twitter URL, even without GitHub
-                    if twitter_url:
-                        save_profile(so_url, None, None, None, so_description, twitter_url)
-                    
-                    # If no GitHub URL, mark as processed and continue
-                    if not github_url:
-                        results.append({
-                            "stackoverflow_url": so_url,
-                            "status": "no_github_profile",
-                            "stackoverflow_description": so_description,
-                            "twitter_url": twitter_url
-                        })
-                        processed_urls.append(so_url)
-                        continue
-                    
-                    # Get GitHub info and save complete profile
-                    try:
-                        email, profile = scraper.get_github_info(github_url)
-                        save_profile(so_url, github_url, email, profile, so_description, twitter_url)
-                        
-                        results.append({
-                            "stackoverflow_url": so_url,
-                            "github_url": github_url,
-                            "email": email,
-                            "status": "success",
-                            "stackoverflow_description": so_description,
-                            "twitter_url": twitter_url
-                        })
-                        processed_urls.append(so_url)
-                    except ValueError as e:
-                        if "rate limit exceeded" in str(e).lower():
-                            # Stop processing this batch if rate limited
-                            print("GitHub rate limit exceeded, stopping batch")
-                            break
-                        results.append({
-                            "stackoverflow_url": so_url,
-                            "status": "error",
-                            "error": str(e)
-                        })
-                        processed_urls.append(so_url)
-                except ValueError as e:
-                    if "rate limit exceeded" in str(e).lower():
-                        # Stop processing this batch if rate limited
-                        print("GitHub rate limit exceeded, stopping batch")
-                        break
-                    results.append({
-                        "stackoverflow_url": so_url,
-                        "status": "error",
-                        "error": str(e)
-                    })
-                    processed_urls.append(so_url)
-                    
-            except Exception as e:
-                results.append({
-                    "stackoverflow_url": so_url,
-                    "status": "error",
-                    "error": str(e)
-                })
-                processed_urls.append(so_url)
-        
-        # Update counter with processed URLs
-        if processed_urls:
-            new_counter = counter + len(processed_urls)
-            update_counter(new_counter, processed_urls)
-            print(f"Updated counter to {new_counter}, processed {len(processed_urls)} URLs")
+        # Renew our leases in the background until the batch is saved
+        with LeaseHeartbeat(worker_id):
+            # Scrape the whole batch in parallel; results come back in batch order
+            outcomes = scraper.map_concurrent(
+                lambda so_url: process_url(scraper, so_url, deadline, memo, writer),
+                batch_urls
+            )
+            
+            for claimed_url, (result, processed) in zip(batch_urls, outcomes):
+                results.append(result)
+                if processed:
+                    statuses[claimed_url] = profile_status(result)
+            
+            # Save the batch's profiles in one upsert, then each finished URL's status and the counter
+            counter = writer.flush(worker_id, statuses)
+        if statuses:
+            print(f"Updated counter to {counter}, processed {len(statuses)} URLs")
         
         return {
-            "message": f"Processed {len(processed_urls)} profiles",
-            "current_index": counter + len(processed_urls),
+            "message": f"Processed {len(statuses)} profiles",
+            "worker_id": worker_id,
+            "claimed": len(batch_urls),
+            "last_id": last_id,
+            "current_index": counter,
+            "deferred": len([result for result in results if result["status"] == "deferred"]),
+            "deadline_reached": deadline.expired(MIN_FETCH_BUDGET),
+            "hosts": scraper.circuit_breaker.snapshot(),
+            "connections": scraper.connection_stats(),
+            "extraction": scraper.extraction_stats(),
+            "github_memo": memo.stats(),
+            "profile_writes": writer.stats(),
+            "cache": scraper.cache_stats(),
+            "negative_cache": scraper.negative_cache_stats(),
             "results": results
         }
         
@@ -132,6 +178,9 @@ def process_batch():
             "error": str(e),
             "current_index": counter
         }
+    finally:
+        # Deferred URLs go back to the queue; processed ones are excluded from claims anyway
+        release_claims(worker_id)
 
 class Handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -15,7 +15,12 @@ logger = logging.getLogger('github_api')
 
 # Add parent directory to path to import github_scraper
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from github_scraper import GithubScraper
+from github_scraper import get_shared_scraper, TransientHostError, RateLimitError
+from deadline import Deadline, DeadlineExceeded
+from stackoverflow_urls import stackoverflow_user_id
+
+# Seconds a request may spend scraping before it gives up with a 504
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '25'))
 
 def validate_github_url(url):
     """Validate GitHub URL format"""
@@ -35,22 +40,21 @@ def validate_stackoverflow_url(url):
         parsed = urlparse(url)
         if not parsed.netloc or 'stackoverflow.com' not in parsed.netloc:
             return False, "Invalid Stack Overflow URL"
-        if not parsed.path.startswith('/users/'):
-            return False, "URL must be a Stack Overflow user profile"
+        if stackoverflow_user_id(url) is None:
+            return False, "URL must be a Stack Overflow user profile (/users/<id>)"
         return True, None
     except Exception as e:
         return False, f"Invalid URL format: {str(e)}"
 
 def init_scraper():
-    """Initialize the scraper with proper error handling"""
+    """Return the warm shared scraper, (re)building it if the cookies changed"""
     try:
         cookies_str = os.getenv('GITHUB_COOKIES')
         if not cookies_str:
             logger.error("GITHUB_COOKIES environment variable not set")
             raise ValueError("GitHub cookies not configured")
         
-        cookies_dict = json.loads(cookies_str)
-        return GithubScraper(cookies_dict)
+        return get_shared_scraper(cookies_str)
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in GITHUB_COOKIES: {e}")
         raise ValueError("Invalid GitHub cookies format")
@@ -68,6 +72,7 @@ class handler(BaseHTTPRequestHandler):
 
     def do_POST(self):
         request_id = os.urandom(8).hex()  # Generate unique request ID
+        deadline = Deadline(REQUEST_DEADLINE_SECONDS)
         logger.info(f"Request {request_id}: Processing new request")
         
         try:
@@ -87,7 +92,18 @@ class handler(BaseHTTPRequestHandler):
                 logger.info(f"Request {request_id}: Processing GitHub URL: {data['github_url']}")
                 
                 scraper = init_scraper()
-                email, profile = scraper.get_github_info(data['github_url'])
+                outcome = scraper.dead_end(data['github_url'])
+                if outcome:
+                    self.send_json_response(404, {
+                        "success": False,
+                        "error": "No information found for this GitHub profile",
+                        "reason": outcome,
+                        "request_id": request_id
+                    })
+                    return
+                
+                with scraper.track_cache() as cache_log:
+                    email, profile = scraper.get_github_info(data['github_url'], deadline=deadline)
                 
                 if not email and not profile:
                     logger.warning(f"Request {request_id}: No information found")
@@ -99,10 +115,12 @@ class handler(BaseHTTPRequestHandler):
                     return
                 
                 logger.info(f"Request {request_id}: Successfully retrieved profile information")
+                logger.info(f"Request {request_id}: Connection reuse: {scraper.connection_stats()}")
                 self.send_json_response(200, {
                     "success": True,
                     "email": email,
                     "profile": profile,
+                    "cache": cache_log,
                     "request_id": request_id
                 })
             elif 'stackoverflow_url' in data:
@@ -114,9 +132,19 @@ class handler(BaseHTTPRequestHandler):
                 logger.info(f"Request {request_id}: Processing Stack Overflow URL: {data['stackoverflow_url']}")
                 
                 scraper = init_scraper()
+                outcome = scraper.dead_end(data['stackoverflow_url'])
+                if outcome:
+                    self.send_json_response(404, {
+                        "success": False,
+                        "error": "No GitHub profile found for this Stack Overflow user",
+                        "reason": outcome,
+                        "request_id": request_id
+                    })
+                    return
                 
                 # First get the GitHub URL from Stack Overflow
-                github_url, description, twitter_url = scraper.get_github_link(data['stackoverflow_url'])
+                with scraper.track_cache() as cache_log:
+                    github_url, description, twitter_url, _ = scraper.get_github_link(data['stackoverflow_url'], deadline=deadline)
                 if not github_url:
                     logger.warning(f"Request {request_id}: No GitHub profile found")
                     self.send_json_response(404, {
@@ -127,9 +155,19 @@ class handler(BaseHTTPRequestHandler):
                     return
 
                 logger.info(f"Request {request_id}: Found GitHub URL: {github_url}")
+                outcome = scraper.dead_end(github_url)
+                if outcome:
+                    self.send_json_response(404, {
+                        "success": False,
+                        "error": "No information found on GitHub profile",
+                        "reason": outcome,
+                        "request_id": request_id
+                    })
+                    return
                 
                 # Then get the GitHub profile information
-                email, profile = scraper.get_github_info(github_url)
+                with scraper.track_cache(cache_log):
+                    email, profile = scraper.get_github_info(github_url, deadline=deadline)
                 
                 if not email and not profile:
                     logger.warning(f"Request {request_id}: No information found on GitHub profile")
@@ -141,6 +179,7 @@ class handler(BaseHTTPRequestHandler):
                     return
                 
                 logger.info(f"Request {request_id}: Successfully retrieved profile information")
+                logger.info(f"Request {request_id}: Connection reuse: {scraper.connection_stats()}")
                 self.send_json_response(200, {
                     "success": True,
                     "stackoverflow_url": data['stackoverflow_url'],
@@ -149,6 +188,7 @@ class handler(BaseHTTPRequestHandler):
                     "profile": profile,
                     "description": description,
                     "twitter_url": twitter_url,
+                    "cache": cache_log,
                     "request_id": request_id
                 })
             else:
@@ -161,6 +201,20 @@ class handler(BaseHTTPRequestHandler):
                 "error": "Invalid JSON in request body",
                 "request_id": request_id
             })
+        except DeadlineExceeded as e:
+            logger.error(f"Request {request_id}: Deadline exceeded: {str(e)}")
+            self.send_json_response(504, {
+                "success": False,
+                "error": str(e),
+                "request_id": request_id
+            })
+        except TransientHostError as e:
+            logger.warning(f"Request {request_id}: Upstream temporarily unavailable: {str(e)}")
+            self.send_json_response(429 if isinstance(e, RateLimitError) else 503, {
+                "success": False,
+                "error": str(e),
+                "request_id": request_id
+            })
         except ValueError as e:
             logger.error(f"Request {request_id}: Validation error: {str(e)}")
             self.send_json_response(400, {
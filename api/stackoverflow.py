@@ -15,7 +15,12 @@ logger = logging.getLogger('stackoverflow_api')
 
 # Add parent directory to path to import github_scraper
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from github_scraper import GithubScraper
+from github_scraper import get_shared_scraper, TransientHostError, RateLimitError
+from deadline import Deadline, DeadlineExceeded
+from stackoverflow_urls import stackoverflow_user_id
+
+# Seconds a request may spend scraping before it gives up with a 504
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '25'))
 
 def validate_stackoverflow_url(url):
     """Validate Stack Overflow URL format"""
@@ -23,22 +28,21 @@ def validate_stackoverflow_url(url):
         parsed = urlparse(url)
         if not parsed.netloc or 'stackoverflow.com' not in parsed.netloc:
             return False, "Invalid Stack Overflow URL"
-        if not parsed.path.startswith('/users/'):
-            return False, "URL must be a Stack Overflow user profile"
+        if stackoverflow_user_id(url) is None:
+            return False, "URL must be a Stack Overflow user profile (/users/<id>)"
         return True, None
     except Exception as e:
         return False, f"Invalid URL format: {str(e)}"
 
 def init_scraper():
-    """Initialize the scraper with proper error handling"""
+    """Return the warm shared scraper, (re)building it if the cookies changed"""
     try:
         cookies_str = os.getenv('GITHUB_COOKIES')
         if not cookies_str:
             logger.error("GITHUB_COOKIES environment variable not set")
             raise ValueError("GitHub cookies not configured")
         
-        cookies_dict = json.loads(cookies_str)
-        return GithubScraper(cookies_dict)
+        return get_shared_scraper(cookies_str)
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in GITHUB_COOKIES: {e}")
         raise ValueError("Invalid GitHub cookies format")
@@ -56,6 +60,7 @@ class handler(BaseHTTPRequestHandler):
 
     def do_POST(self):
         request_id = os.urandom(8).hex()  # Generate unique request ID
+        deadline = Deadline(REQUEST_DEADLINE_SECONDS)
         logger.info(f"Request {request_id}: Processing new request")
         
         try:
@@ -77,7 +82,18 @@ class handler(BaseHTTPRequestHandler):
             logger.info(f"Request {request_id}: Processing URL: {data['stackoverflow_url']}")
             
             scraper = init_scraper()
-            github_url = scraper.get_github_link(data['stackoverflow_url'])
+            outcome = scraper.dead_end(data['stackoverflow_url'])
+            if outcome:
+                self.send_json_response(404, {
+                    "success": False,
+                    "error": "No GitHub profile found for this Stack Overflow user",
+                    "reason": outcome,
+                    "request_id": request_id
+                })
+                return
+            
+            with scraper.track_cache() as cache_log:
+                github_url, _, _, _ = scraper.get_github_link(data['stackoverflow_url'], deadline=deadline)
             
             if not github_url:
                 logger.warning(f"Request {request_id}: No GitHub profile found")
@@ -88,9 +104,11 @@ class handler(BaseHTTPRequestHandler):
                 return
             
             logger.info(f"Request {request_id}: Successfully found GitHub URL: {github_url}")
+            logger.info(f"Request {request_id}: Connection reuse: {scraper.connection_stats()}")
             self.send_json_response(200, {
                 "success": True,
                 "github_url": github_url,
+                "cache": cache_log,
                 "request_id": request_id
             })
             
@@ -101,6 +119,20 @@ class handler(BaseHTTPRequestHandler):
                 "error": "Invalid JSON in request body",
                 "request_id": request_id
             })
+        except DeadlineExceeded as e:
+            logger.error(f"Request {request_id}: Deadline exceeded: {str(e)}")
+            self.send_json_response(504, {
+                "success": False,
+                "error": str(e),
+                "request_id": request_id
+            })
+        except TransientHostError as e:
+            logger.warning(f"Request {request_id}: Upstream temporarily unavailable: {str(e)}")
+            self.send_json_response(429 if isinstance(e, RateLimitError) else 503, {
+                "success": False,
+                "error": str(e),
+                "request_id": request_id
+            })
         except ValueError as e:
             logger.error(f"Request {request_id}: Validation error: {str(e)}")
             self.send_json_response(400, {
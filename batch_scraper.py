@@ -1,10 +1,14 @@
-import csv
 import os
 import json
-from github_scraper import GithubScraper
+from github_scraper import GithubScraper, TransientHostError
+from request_coalescing import RunMemo
+from csv_stream import iter_rows
+from stackoverflow_urls import normalize_stackoverflow_url
 
 BATCH_SIZE = 20
 COUNTER_FILE = 'profile_counter.txt'
+# "<counter> <byte offset>" of the next profile, so a batch can seek straight to it
+OFFSET_FILE = 'profile_counter.offset'
 CSV_FILE = 'Test SO Links for Vercel Function - Sheet1.csv'
 
 def get_counter():
@@ -22,6 +26,53 @@ def update_counter(value):
     with open(COUNTER_FILE, 'w') as f:
         f.write(str(value))
 
+def get_offset(counter):
+    """Return the byte offset of profile number `counter` in CSV_FILE.
+
+    Uses the offset saved with the counter; if it is missing or was saved for a
+    different counter, the earlier rows are skipped once without keeping them.
+    """
+    try:
+        with open(OFFSET_FILE, 'r') as f:
+            saved_counter, offset = (int(value) for value in f.read().split())
+        if saved_counter == counter:
+            return offset
+    except (FileNotFoundError, ValueError):
+        pass
+    offset = 0
+    for index, (_, next_offset) in enumerate(iter_rows(CSV_FILE)):
+        if index >= counter:
+            break
+        offset = next_offset
+    return offset
+
+def update_offset(counter, offset):
+    """Save the byte offset of profile number `counter`"""
+    with open(OFFSET_FILE, 'w') as f:
+        f.write(f"{counter} {offset}")
+
+def scrape_profile(scraper, so_url, memo=None):
+    """Fetch the Stack Overflow profile and its linked GitHub profile.
+
+    Returns (github_url, so_description, twitter_url, profile_text, email, profile).
+    """
+    so_url = normalize_stackoverflow_url(so_url)
+    
+    # Get GitHub profile and Stack Overflow details
+    github_url, so_description, twitter_url, profile_text = scraper.get_github_link(so_url)
+    if not github_url:
+        return github_url, so_description, twitter_url, profile_text, None, None
+    
+    email, profile = scraper.get_github_info(github_url, memo=memo)
+    return github_url, so_description, twitter_url, profile_text, email, profile
+
+def scrape_profile_or_defer(scraper, so_url, memo=None):
+    """Like scrape_profile, but returns the TransientHostError instead of raising it"""
+    try:
+        return scrape_profile(scraper, so_url, memo)
+    except TransientHostError as e:
+        return e
+
 def process_batch():
     """Process a batch of Stack Overflow profiles"""
     counter = get_counter()
@@ -29,30 +80,50 @@ def process_batch():
     profiles_processed = 0
     
     try:
-        # Read all URLs from CSV
-        with open(CSV_FILE, 'r') as f:
-            reader = csv.DictReader(f)
-            urls = [row['StackOverflow Link'] for row in reader]
-        
-        # Get the batch to process
+        # Stream just this batch's URLs from the CSV, starting at the saved offset
         start_idx = counter
-        end_idx = min(start_idx + BATCH_SIZE, len(urls))
-        batch_urls = urls[start_idx:end_idx]
+        start_offset = get_offset(counter)
+        batch_urls = []
+        row_offsets = []
+        for row, next_offset in iter_rows(CSV_FILE, start_offset):
+            if len(batch_urls) >= BATCH_SIZE:
+                break
+            batch_urls.append(row['StackOverflow Link'])
+            row_offsets.append(next_offset)
+        end_idx = start_idx + len(batch_urls)
+        end_offset = row_offsets[-1] if row_offsets else start_offset
         
         print(f"\nProcessing profiles {start_idx + 1} to {end_idx}")
         print("-" * 50)
         
-        # Process each URL in the batch
-        for i, so_url in enumerate(batch_urls, start=1):
+        # Rows naming the same Stack Overflow user are scraped once, by user id
+        batch_urls = [normalize_stackoverflow_url(so_url) for so_url in batch_urls]
+        unique_urls = list(dict.fromkeys(batch_urls))
+        
+        # Scrape the whole batch in parallel, then report in batch order;
+        # profiles linking the same GitHub account share one fetch
+        memo = RunMemo()
+        scraped = dict(zip(unique_urls, scraper.map_concurrent(
+            lambda so_url: scrape_profile_or_defer(scraper, so_url, memo),
+            unique_urls
+        )))
+        profiles = [scraped[so_url] for so_url in batch_urls]
+        
+        # Resume the next batch from the first profile a host told us to retry later
+        deferred = [i for i, profile_data in enumerate(profiles) if isinstance(profile_data, TransientHostError)]
+        if deferred:
+            end_idx = start_idx + deferred[0]
+            end_offset = row_offsets[deferred[0] - 1] if deferred[0] else start_offset
+        
+        for i, (so_url, profile_data) in enumerate(zip(batch_urls, profiles), start=1):
             print(f"\nProfile {start_idx + i}:")
             print(f"Stack Overflow: {so_url}")
             
-            # Ensure URL starts with https://
-            if not so_url.startswith('http'):
-                so_url = f"https://{so_url}"
+            if isinstance(profile_data, TransientHostError):
+                print(f"Deferred: {profile_data}")
+                continue
             
-            # Get GitHub profile and Stack Overflow details
-            github_url, so_description, twitter_url, profile_text = scraper.get_github_link(so_url)
+            github_url, so_description, twitter_url, profile_text, email, profile = profile_data
             
             if so_description:
                 print(f"Stack Overflow Description: {so_description[:200]}...")
@@ -66,7 +137,6 @@ def process_batch():
                 continue
             
             # Get GitHub info
-            email, profile = scraper.get_github_info(github_url)
             print(f"GitHub: {github_url}")
             print(f"Email: {email}")
             if profile:
@@ -75,14 +145,19 @@ def process_batch():
             
             profiles_processed += 1
         
+        scraper.close()
+        
         # Update counter
         update_counter(end_idx)
+        update_offset(end_idx, end_offset)
         
         print(f"\nBatch complete! Processed {profiles_processed} profiles")
+        print(f"GitHub profile memo: {memo.stats()}")
+        print(f"Duplicate profiles skipped: {len(batch_urls) - len(unique_urls)}")
         print(f"Next batch will start from profile {end_idx + 1}")
         
         # Return True if there are more profiles to process
-        return end_idx < len(urls)
+        return next(iter_rows(CSV_FILE, end_offset), None) is not None
         
     except Exception as e:
         print(f"Error processing batch: {e}")
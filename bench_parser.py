@@ -0,0 +1,57 @@
+import logging
+import os
+import sys
+import time
+from github_scraper import GithubScraper
+from html_parsers import PARSER_BACKENDS, HAS_LXML
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample-html-for-gh.html')
+ITERATIONS = 200
+
+def extract_all(scraper, html):
+    """Run every Stack Overflow extractor over html with the scraper's parser backend"""
+    soup = scraper.parser.parse(html)
+    return scraper._extract_github_link(soup), scraper._extract_stackoverflow_info(soup)
+
+def bench_parsers(html_path=SAMPLE_FILE, iterations=ITERATIONS):
+    """Time parse + extraction per backend and check all backends agree on the fields"""
+    with open(html_path, encoding='utf-8') as f:
+        html = f.read()
+
+    print(f"Benchmarking {os.path.basename(html_path)} ({len(html)} bytes), {iterations} iterations")
+    if not HAS_LXML:
+        print("lxml is not installed, only html.parser will be measured")
+
+    baseline = None
+    timings = {}
+    for name in PARSER_BACKENDS:
+        if name == 'lxml' and not HAS_LXML:
+            continue
+        scraper = GithubScraper(parser=name)
+        fields = extract_all(scraper, html)
+        if baseline is None:
+            baseline = fields
+        elif fields != baseline:
+            print(f"MISMATCH: {name} extracted different fields")
+            print(f"  expected: {baseline}")
+            print(f"  got:      {fields}")
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            scraper.parser.parse(html)
+        parse_only = (time.perf_counter() - start) / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            extract_all(scraper, html)
+        timings[name] = (parse_only, (time.perf_counter() - start) / iterations)
+
+    slowest = max(total for _, total in timings.values())
+    for name, (parse_only, total) in timings.items():
+        print(f"{name:>12}: parse {parse_only * 1000:.2f} ms, parse + extract {total * 1000:.2f} ms/profile ({slowest / total:.1f}x)")
+    return timings
+
+if __name__ == "__main__":
+    # Keep per-profile log lines out of the measurement
+    logging.getLogger('github_scraper').setLevel(logging.WARNING)
+    bench_parsers(*sys.argv[1:2])
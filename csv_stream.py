@@ -0,0 +1,38 @@
+import csv
+
+def _read_header(f, encoding):
+    """Read the header row from the start of f and return (fieldnames, offset just past it)"""
+    f.seek(0)
+    lines = _iter_lines(f, 'utf-8-sig' if encoding.lower().replace('_', '-') in ('utf-8', 'utf8') else encoding)
+    fieldnames = next(csv.reader(lines), None)
+    return fieldnames, f.tell()
+
+def _iter_lines(f, encoding, position=None):
+    """Yield decoded lines from binary file f, recording the byte offset after each in position[0]"""
+    while True:
+        raw = f.readline()
+        if not raw:
+            return
+        if position is not None:
+            position[0] += len(raw)
+        yield raw.decode(encoding)
+
+def iter_rows(path, start_offset=0, encoding='utf-8'):
+    """Stream rows of a CSV file as dicts keyed by its header.
+
+    Yields (row, next_offset) where next_offset is the byte offset just past
+    the row; passing it back as start_offset resumes at the following row
+    without reading anything before it. Only one row is held in memory at a time.
+    """
+    with open(path, 'rb') as f:
+        fieldnames, data_start = _read_header(f, encoding)
+        if fieldnames is None:
+            return
+        position = [max(start_offset, data_start)]
+        f.seek(position[0])
+        for values in csv.reader(_iter_lines(f, encoding, position)):
+            if not values:
+                continue
+            # Short rows get None for their missing columns, like csv.DictReader
+            values += [None] * (len(fieldnames) - len(values))
+            yield dict(zip(fieldnames, values)), position[0]
@@ -0,0 +1,18 @@
+import time
+
+class DeadlineExceeded(ValueError):
+    """Too little of the caller's time budget is left to start another fetch"""
+
+class Deadline:
+    """Overall time budget handed down from a handler to every fetch it triggers"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self, reserve=0.0):
+        """True once no more than `reserve` seconds of the budget are left"""
+        return self.remaining() <= reserve
@@ -0,0 +1,220 @@
+import html
+import re
+from html.entities import html5 as HTML5_ENTITIES
+
+# Raw-text regions whose contents the HTML parsers never turn into tags: script
+# and style bodies, comments, CDATA sections, and the declarations, processing
+# instructions and bogus end tags both parsers end at the first '>'
+_RAW_REGION_RE = re.compile(
+    r'<(script|style)\b.*?</\1\s*>|<!--.*?-->|<!\[CDATA\[.*?\]\]>|<![^>]*>|<\?[^>]*>|</(?![A-Za-z])[^>]*>',
+    re.IGNORECASE | re.DOTALL
+)
+_MASK = '\x00'
+# Elements whose contents browsers read as text but html.parser and lxml may
+# parse as markup; a '<' inside one means the parsers can disagree with us
+_TEXT_ELEMENTS = ('title', 'textarea', 'xmp', 'iframe', 'noembed', 'noframes', 'plaintext')
+# Markup that identifies an element one of the fields is read from
+_FIELD_HINTS = ('itemprop', 'text-bold color-fg-default', 'user-profile-bio', 'f4 text-normal mb-2',
+                'js-pinned-items-reorder-container')
+_ATTR_RE = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+_MARKUP_RE = re.compile(r'<[^>]*>')
+_ENTITY_RE = re.compile(r'&([^;&\s<]*)(;?)')
+_TAG_RES = {}
+FIELDS = ('name', 'email', 'location', 'company', 'website', 'followers', 'following',
+          'bio', 'contributions', 'pinned_repositories')
+
+class Ambiguous(Exception):
+    """The markup around a field is not simple enough to read without a DOM"""
+
+def _tag_re(name):
+    if name not in _TAG_RES:
+        _TAG_RES[name] = re.compile(r'<(/?)%s(?=[\s/>])([^>]*)>' % name, re.IGNORECASE)
+    return _TAG_RES[name]
+
+def _parse_attrs(raw):
+    attrs = {}
+    for match in _ATTR_RE.finditer(raw):
+        name = match.group(1).lower()
+        if name not in attrs:
+            value = next((v for v in match.group(2, 3, 4) if v is not None), '')
+            attrs[name] = html.unescape(value)
+    return attrs
+
+def _classes(attrs):
+    return attrs.get('class', '').split()
+
+def _inner(doc, name, open_tag, end):
+    """Return the body of the element opened by open_tag, honoring nested same-name tags"""
+    depth = 1
+    for match in _tag_re(name).finditer(doc, open_tag.end(), end):
+        if match.group(1):
+            depth -= 1
+        elif not match.group(2).endswith('/'):
+            depth += 1
+        if depth == 0:
+            return doc[open_tag.end():match.start()]
+    raise Ambiguous(f"unclosed <{name}>")
+
+def _find_all(doc, name, hint, predicate, start=0, end=None):
+    """Yield (attrs, inner_html) for every `name` element whose attributes satisfy predicate.
+
+    Tags whose raw attribute text lacks `hint` (and has no entity that could
+    spell it) are skipped without parsing their attributes.
+    """
+    end = len(doc) if end is None else end
+    for match in _tag_re(name).finditer(doc, start, end):
+        raw = match.group(2)
+        if match.group(1) or raw.endswith('/') or (hint not in raw and '&' not in raw):
+            continue
+        attrs = _parse_attrs(raw)
+        if predicate(attrs):
+            yield attrs, _inner(doc, name, match, end)
+
+def _check_text_elements(doc):
+    """Raise Ambiguous if a text-only element holds markup or is never closed"""
+    for name in _TEXT_ELEMENTS:
+        for match in _tag_re(name).finditer(doc):
+            if match.group(1):
+                continue
+            close = _tag_re(name).search(doc, match.end())
+            while close and not close.group(1):
+                close = _tag_re(name).search(doc, close.end())
+            if close is None:
+                raise Ambiguous(f"unclosed <{name}>")
+            body = doc[match.end():close.start()]
+            if '<' in body or _MASK in body:
+                raise Ambiguous(f"markup inside <{name}>")
+
+def _mask_region(match):
+    region = match.group(0)
+    # html.parser ends a CDATA section at ']]>', lxml at the first '>'
+    if region.startswith('<![CDATA[') and '>' in region[9:-3]:
+        raise Ambiguous("'>' inside a CDATA section")
+    return _MASK
+
+def _mask_templates(doc):
+    """Mask <template> contents, which the parsers keep out of the text the fields are read from.
+
+    Raise Ambiguous if a template holds markup a field could be read from,
+    since the DOM would still find that element there.
+    """
+    parts = []
+    position = 0
+    for match in _tag_re('template').finditer(doc):
+        if match.group(1) or match.start() < position:
+            continue
+        body = _inner(doc, 'template', match, len(doc))
+        lowered = body.lower()
+        if any(hint in lowered for hint in _FIELD_HINTS) or re.search(r'<[^>]*&', body):
+            raise Ambiguous("field markup inside <template>")
+        parts.append(doc[position:match.end()])
+        parts.append(_MASK)
+        position = match.end() + len(body)
+    parts.append(doc[position:])
+    return ''.join(parts)
+
+def _first(doc, name, hint, predicate):
+    return next(_find_all(doc, name, hint, predicate), (None, None))
+
+def _text(inner):
+    """Equivalent of BeautifulSoup's `.text` for a simple element body"""
+    if _MASK in inner:
+        raise Ambiguous("script, style or comment inside the element")
+    stripped = _MARKUP_RE.sub('', inner)
+    if '<' in stripped or '>' in stripped or '\r' in stripped:
+        raise Ambiguous("stray markup characters")
+    for match in _ENTITY_RE.finditer(stripped):
+        entity, semicolon = match.groups()
+        if not semicolon or (not entity.startswith('#') and entity + ';' not in HTML5_ENTITIES):
+            raise Ambiguous("entity the parsers may decode differently")
+    return html.unescape(stripped)
+
+def extract_github_profile_fields(page):
+    """Read the fields GithubScraper._extract_github_info produces straight from the page text.
+
+    Returns (fields, ambiguous) where ambiguous is the set of field names whose
+    markup could not be read with confidence; those must come from the DOM.
+    A field whose element does not appear on the page is confidently None.
+    """
+    try:
+        doc = _mask_templates(_RAW_REGION_RE.sub(_mask_region, page))
+        _check_text_elements(doc)
+    except Ambiguous:
+        # Which tags exist at all depends on the parser, so every field is in doubt
+        return dict.fromkeys(FIELDS), set(FIELDS)
+    fields = {}
+    ambiguous = set()
+
+    def read(field, func):
+        try:
+            fields[field] = func()
+        except Ambiguous:
+            fields[field] = None
+            ambiguous.add(field)
+
+    def itemprop_text(tag, prop):
+        _, inner = _first(doc, tag, prop, lambda attrs: attrs.get('itemprop') == prop)
+        if inner is None:
+            return None
+        if ('<' + tag) in inner.lower():
+            raise Ambiguous(f"nested <{tag}>")
+        return _text(inner).strip()
+
+    def website():
+        _, inner = _first(doc, 'li', 'url', lambda attrs: attrs.get('itemprop') == 'url')
+        if inner is None:
+            return None
+        if '<li' in inner.lower() or _MASK in inner:
+            raise Ambiguous("nested <li>")
+        link = _tag_re('a').search(inner)
+        while link and link.group(1):
+            link = _tag_re('a').search(inner, link.end())
+        if not link:
+            return None
+        attrs = _parse_attrs(link.group(2))
+        if 'href' not in attrs:
+            raise Ambiguous("link without href")
+        return attrs['href']
+
+    def exact_class_text(tag, classes):
+        _, inner = _first(doc, tag, classes.split()[-1], lambda attrs: ' '.join(_classes(attrs)) == classes)
+        return _text(inner).strip() if inner is not None else None
+
+    def count(label):
+        for _, inner in _find_all(doc, 'span', 'color-fg-default', lambda attrs: ' '.join(_classes(attrs)) == 'text-bold color-fg-default'):
+            if '<' in inner:
+                raise Ambiguous("count span with nested markup")
+            text = _text(inner)
+            if label in text.lower():
+                return text.strip().split()[0]
+        return '0'
+
+    def pinned_repositories():
+        _, section = _first(doc, 'div', 'js-pinned-items-reorder-container', lambda attrs: 'js-pinned-items-reorder-container' in _classes(attrs))
+        if section is None:
+            return []
+        repos = []
+        for _, item in _find_all(section, 'div', 'pinned-item-list-item-content', lambda attrs: 'pinned-item-list-item-content' in _classes(attrs)):
+            if 'pinned-item-list-item-content' in item:
+                raise Ambiguous("nested pinned items")
+            _, name = _first(item, 'span', 'repo', lambda attrs: 'repo' in _classes(attrs))
+            if name is None:
+                continue
+            _, desc = _first(item, 'p', 'pinned-item-desc', lambda attrs: 'pinned-item-desc' in _classes(attrs))
+            repos.append({
+                'name': _text(name).strip(),
+                'description': _text(desc).strip() if desc is not None else None
+            })
+        return repos
+
+    read('name', lambda: itemprop_text('span', 'name'))
+    read('email', lambda: itemprop_text('li', 'email'))
+    read('location', lambda: itemprop_text('li', 'homeLocation'))
+    read('company', lambda: itemprop_text('li', 'worksFor'))
+    read('website', website)
+    read('followers', lambda: count('followers'))
+    read('following', lambda: count('following'))
+    read('bio', lambda: exact_class_text('div', 'p-note user-profile-bio'))
+    read('contributions', lambda: exact_class_text('h2', 'f4 text-normal mb-2'))
+    read('pinned_repositories', pinned_repositories)
+    return fields, ambiguous
@@ -1,14 +1,31 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import os
-import csv
 import json
 import time
-import pandas as pd
+import hashlib
+import tempfile
 import logging
-from urllib.parse import urljoin
+import threading
+import multiprocessing
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin, urlparse
 from dotenv import load_dotenv
 from typing import Optional, Dict, Any, Tuple
+from rate_limiter import HostRateLimiter
+from retry_policy import RetryPolicy, CircuitBreaker
+from html_parsers import get_parser_backend
+from fast_extract import extract_github_profile_fields
+from csv_stream import iter_rows
+from output_sinks import get_sink_class, sanitize_csv_field
+from response_cache import ResponseCache, NegativeCache
+from stackoverflow_urls import canonical_stackoverflow_url
+from deadline import Deadline, DeadlineExceeded
+from request_coalescing import RunMemo
 
 # Load environment variables
 load_dotenv()
@@ -20,10 +37,205 @@ logging.basicConfig(
 )
 logger = logging.getLogger('github_scraper')
 
+# Maximum number of requests kept in flight at once against each host
+HOST_CONCURRENCY = {
+    'stackoverflow.com': int(os.getenv('SCRAPER_STACKOVERFLOW_CONCURRENCY', '4')),
+    'github.com': int(os.getenv('SCRAPER_GITHUB_CONCURRENCY', '4')),
+}
+DEFAULT_HOST_CONCURRENCY = 2
+
+# Sustained requests per second and burst size allowed against each host
+HOST_RATE_LIMITS = {
+    'stackoverflow.com': (
+        float(os.getenv('SCRAPER_STACKOVERFLOW_RPS', '1')),
+        int(os.getenv('SCRAPER_STACKOVERFLOW_BURST', '2')),
+    ),
+    'github.com': (
+        float(os.getenv('SCRAPER_GITHUB_RPS', '1')),
+        int(os.getenv('SCRAPER_GITHUB_BURST', '2')),
+    ),
+}
+# Optional file used to share the rate limit budget between invocations
+RATE_LIMIT_STATE_PATH = os.getenv('SCRAPER_RATE_STATE_PATH')
+
+# Retries for 429/5xx responses and the per-host circuit breaker
+MAX_RETRIES = int(os.getenv('SCRAPER_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.getenv('SCRAPER_BACKOFF_BASE', '1'))
+BACKOFF_MAX = float(os.getenv('SCRAPER_BACKOFF_MAX', '30'))
+RETRY_AFTER_MAX = float(os.getenv('SCRAPER_RETRY_AFTER_MAX', '60'))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('SCRAPER_BREAKER_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('SCRAPER_BREAKER_RESET_TIMEOUT', '60'))
+
+# Connection pool sizing: number of per-host pools kept and connections kept per pool
+POOL_CONNECTIONS = int(os.getenv('SCRAPER_POOL_CONNECTIONS', '10'))
+POOL_MAXSIZE = int(os.getenv('SCRAPER_POOL_MAXSIZE', '8'))
+
+# Per-request (connect, read) timeouts in seconds
+CONNECT_TIMEOUT = float(os.getenv('SCRAPER_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('SCRAPER_READ_TIMEOUT', '15'))
+# A fetch is not started when less than this many seconds of a deadline remain
+MIN_FETCH_BUDGET = float(os.getenv('SCRAPER_MIN_FETCH_BUDGET', '3'))
+
+# Seconds a successful page stays fresh in the response cache per host (0 disables),
+# pages kept in memory, and the SQLite file behind them ('' keeps the cache in memory only)
+# with its caps on stored pages and validator rows
+RESPONSE_CACHE_TTLS = {
+    'stackoverflow.com': float(os.getenv('SCRAPER_STACKOVERFLOW_CACHE_TTL', '21600')),
+    'github.com': float(os.getenv('SCRAPER_GITHUB_CACHE_TTL', '3600')),
+}
+RESPONSE_CACHE_ENTRIES = int(os.getenv('SCRAPER_CACHE_ENTRIES', '256'))
+RESPONSE_CACHE_PATH = os.getenv('SCRAPER_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'github_scraper_cache.sqlite3'))
+RESPONSE_CACHE_DISK_ENTRIES = int(os.getenv('SCRAPER_CACHE_DISK_ENTRIES', '500'))
+RESPONSE_CACHE_VALIDATOR_ENTRIES = int(os.getenv('SCRAPER_CACHE_VALIDATOR_ENTRIES', '10000'))
+# Seconds a URL that led nowhere (no GitHub link, 404, unparseable page) is not fetched again,
+# and how many of those URLs are kept in the cache file
+NEGATIVE_CACHE_TTL = float(os.getenv('SCRAPER_NEGATIVE_CACHE_TTL', '86400'))
+NEGATIVE_CACHE_DISK_ENTRIES = int(os.getenv('SCRAPER_NEGATIVE_CACHE_DISK_ENTRIES', '10000'))
+
+HOST_NAMES = {
+    'stackoverflow.com': 'Stack Overflow',
+    'github.com': 'GitHub',
+}
+
+class TransientHostError(ValueError):
+    """A host is temporarily refusing requests; the work should be retried later"""
+
+class RateLimitError(TransientHostError):
+    """The host kept answering 429 after all retries"""
+
+class CircuitOpenError(TransientHostError):
+    """The host's circuit breaker is open, so the request was not attempted"""
+
+class UpstreamUnavailableError(TransientHostError):
+    """The host kept failing with 5xx responses, connection errors or timeouts after all retries"""
+
+# Only build the parts of a GitHub profile page the extractors read, unless disabled
+TARGETED_PARSE = os.getenv('SCRAPER_TARGETED_PARSE', '1').lower() not in ('0', 'false', 'no')
+
+GITHUB_ITEMPROPS = {'name', 'email', 'homeLocation', 'worksFor', 'url'}
+GITHUB_EXACT_CLASSES = {
+    'span': 'text-bold color-fg-default',
+    'div': 'p-note user-profile-bio',
+    'h2': 'f4 text-normal mb-2',
+}
+
+def _github_profile_element(name, attrs):
+    """True for the top-level elements _extract_github_info reads"""
+    attrs = attrs or {}
+    if attrs.get('itemprop') in GITHUB_ITEMPROPS:
+        return True
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    if 'js-pinned-items-reorder-container' in classes:
+        return True
+    return GITHUB_EXACT_CLASSES.get(name) == ' '.join(classes)
+
+class GithubProfileStrainer(SoupStrainer):
+    """SoupStrainer keeping only the parts of a GitHub profile page the extractor reads.
+
+    Matching elements are kept with their whole subtree, so every element
+    _extract_github_info searches for is still found, in the same document
+    order; scripts, styles and the rest of the page never become tree nodes.
+    """
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        # Hook used while parsing by beautifulsoup4 < 4.13
+        return _github_profile_element(markup_name, markup_attrs)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        # Hook used while parsing by beautifulsoup4 >= 4.13
+        return _github_profile_element(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+GITHUB_PROFILE_STRAINER = GithubProfileStrainer()
+
+# Read GitHub profile fields straight from the page text, building a DOM only
+# when the fast extractor is unsure, unless disabled
+FAST_EXTRACT = os.getenv('SCRAPER_FAST_EXTRACT', '1').lower() not in ('0', 'false', 'no')
+# Every profile page carries these elements; a page without them goes through the DOM
+FAST_EXTRACT_REQUIRED_FIELDS = ('name',)
+
+# Rows process_profiles scrapes at once and how often it logs progress
+PROFILE_WORKERS = int(os.getenv('SCRAPER_PROFILE_WORKERS', '4'))
+PROGRESS_LOG_EVERY = int(os.getenv('SCRAPER_PROGRESS_LOG_EVERY', '10'))
+# Output rows are written out every this many rows or seconds, whichever comes first
+OUTPUT_FLUSH_ROWS = int(os.getenv('SCRAPER_OUTPUT_FLUSH_ROWS', '50'))
+OUTPUT_FLUSH_SECONDS = float(os.getenv('SCRAPER_OUTPUT_FLUSH_SECONDS', '5'))
+
+# Processes that parse downloaded pages while the I/O threads keep fetching; 0 parses in the fetching thread
+PARSE_WORKERS = int(os.getenv('SCRAPER_PARSE_WORKERS', '0'))
+
+# Extraction-only scrapers living in parse worker processes, keyed by their options
+_worker_scrapers = {}
+
+def _parse_in_worker(options, method_name, *args):
+    """Run one of GithubScraper's _read_* methods inside a parse worker process"""
+    if options not in _worker_scrapers:
+        parser, targeted_parse, fast_extract = options
+        _worker_scrapers[options] = GithubScraper(parser=parser, targeted_parse=targeted_parse, fast_extract=fast_extract,
+                                                  response_cache=ResponseCache({}), negative_cache=NegativeCache(0))
+    return getattr(_worker_scrapers[options], method_name)(*args)
+
+# Categories _classify_links sorts Stack Overflow profile links into
+LINK_CATEGORIES = ('twitter', 'github_link', 'github_any', 'github_profile', 'linkedin', 'blog', 'website')
+STACKEXCHANGE_HOSTS = ('stackoverflow.com', 'stackexchange.com', 'serverfault.com', 'superuser.com', 'askubuntu.com', 'mathoverflow.net')
+BLOG_HOSTS = ('medium.com', 'dev.to', 'substack.com', 'hashnode.dev', 'wordpress.com', 'blogspot.com', 'tumblr.com', 'ghost.io')
+
 class GithubScraper:
-    def __init__(self, cookies_dict=None):
+    def __init__(self, cookies_dict=None, stackoverflow_concurrency=None, github_concurrency=None,
+                 rate_limiter=None, parser=None, targeted_parse=None, fast_extract=None, parse_workers=None,
+                 response_cache=None, negative_cache=None):
         logger.info("Initializing GithubScraper")
+        # HTML parser backend name ('lxml' or 'html.parser'); defaults to SCRAPER_PARSER
+        self.parser = get_parser_backend(parser)
+        self.targeted_parse = TARGETED_PARSE if targeted_parse is None else targeted_parse
+        self.fast_extract = FAST_EXTRACT if fast_extract is None else fast_extract
+        self._extraction_counts = Counter()
+        self._fallback_fields = Counter()
+        self._extraction_lock = threading.Lock()
+        self.parse_workers = PARSE_WORKERS if parse_workers is None else parse_workers
+        self._parse_pool = None
+        self._parse_pool_lock = threading.Lock()
+        # A cache may be passed in to share it between several scrapers
+        self.response_cache = response_cache or ResponseCache(
+            RESPONSE_CACHE_TTLS, max_entries=RESPONSE_CACHE_ENTRIES, path=RESPONSE_CACHE_PATH or None,
+            max_disk_entries=RESPONSE_CACHE_DISK_ENTRIES, max_validators=RESPONSE_CACHE_VALIDATOR_ENTRIES
+        )
+        self.negative_cache = negative_cache or NegativeCache(
+            NEGATIVE_CACHE_TTL, RESPONSE_CACHE_PATH or None, max_disk_entries=NEGATIVE_CACHE_DISK_ENTRIES
+        )
+        self._cache_tracking = threading.local()
+        self._cache_variant = self._cookies_fingerprint(cookies_dict)
+        # A limiter may be passed in to share one budget between several scrapers
+        self.rate_limiter = rate_limiter or HostRateLimiter(HOST_RATE_LIMITS, RATE_LIMIT_STATE_PATH)
+        self.retry_policy = RetryPolicy(MAX_RETRIES, BACKOFF_BASE, BACKOFF_MAX, RETRY_AFTER_MAX)
+        self.circuit_breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+        self.host_concurrency = dict(HOST_CONCURRENCY)
+        if stackoverflow_concurrency:
+            self.host_concurrency['stackoverflow.com'] = stackoverflow_concurrency
+        if github_concurrency:
+            self.host_concurrency['github.com'] = github_concurrency
+        self._host_slots = {
+            host: threading.BoundedSemaphore(limit)
+            for host, limit in self.host_concurrency.items()
+        }
+        self._host_slots_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
         self.session = requests.Session()
+        # Keep one pool per host and size it so every concurrent request can keep its
+        # own connection alive; retries are handled by retry_policy, not urllib3
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=max(POOL_MAXSIZE, max(self.host_concurrency.values())),
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
         })
@@ -35,23 +247,336 @@ class GithubScraper:
                 logger.error(f"Error updating cookies: {e}")
                 raise ValueError("Invalid cookies format provided")
 
-    def _make_request(self, url, method='get', **kwargs):
-        """Wrapper for making requests with proper error handling and logging"""
+    @staticmethod
+    def _cookies_fingerprint(cookies_dict):
+        """Tell cached pages fetched with different login cookies apart"""
+        if not cookies_dict:
+            return ''
+        return hashlib.sha256(json.dumps(cookies_dict, sort_keys=True).encode()).hexdigest()[:16]
+
+    @contextmanager
+    def track_cache(self, log=None):
+        """Record how each page this thread requests inside the block was served.
+
+        Yields a dict mapping URL to 'memory', 'disk' (cache hits) or 'miss';
+        pass the same dict again to keep adding to it.
+        """
+        log = {} if log is None else log
+        previous = getattr(self._cache_tracking, 'log', None)
+        self._cache_tracking.log = log
+        try:
+            yield log
+        finally:
+            self._cache_tracking.log = previous
+
+    def _cache_key(self, url):
+        # Every URL of one Stack Overflow user shares the entry of its canonical form
+        return f"{self._cache_variant}|{canonical_stackoverflow_url(url) or url}"
+
+    def canonical_url(self, url):
+        """Scheme-, www-, case-, query- and trailing-slash-insensitive form of a profile URL.
+
+        Stack Overflow profiles are keyed by user id, so name slugs and paths after it don't matter.
+        """
+        so_url = canonical_stackoverflow_url(url)
+        if so_url:
+            return so_url
+        github_key = self._github_memo_key(url) if 'github.com' in (url or '').lower() else None
+        if github_key:
+            return github_key[0]
+        url = (url or '').split('?')[0].split('#')[0].strip().rstrip('/').lower().split('://', 1)[-1]
+        return url[len('www.'):] if url.startswith('www.') else url
+
+    def dead_end(self, url):
+        """Return why url is known to lead nowhere ('no_github_link', 'not_found' or
+        'parse_failed'), or None if it is worth fetching"""
+        outcome = self.negative_cache.get(self.canonical_url(url))
+        if outcome:
+            logger.info(f"Skipping {url}, known dead end: {outcome}")
+        return outcome
+
+    def _record_dead_end(self, url, outcome):
+        self.negative_cache.record(self.canonical_url(url), outcome)
+
+    def _forget_dead_end(self, url):
+        self.negative_cache.forget(self.canonical_url(url))
+
+    def negative_cache_stats(self):
+        """Report how many fetches the negative cache saved, per outcome"""
+        return self.negative_cache.stats()
+
+    def _fetch_and_read(self, url, deadline, method_name, *args):
+        """Fetch url and run a _read_* method on the page.
+
+        The result is remembered with the response's ETag/Last-Modified, and the
+        next fetch of the page is conditional: a 304 returns the remembered
+        result without downloading or parsing the page again.
+        Returns (result, parsed), parsed being False when the result was reused.
+        """
+        validators_key = f"{self._cache_key(url)}|{method_name}"
+        stored = self.response_cache.get_validators(validators_key)
+        response = self._make_request(url, deadline=deadline, validators=stored)
+        if response.status_code == 304 and stored is not None:
+            logger.info(f"{url} not modified, reusing previously extracted fields")
+            self.response_cache.record_not_modified()
+            # The stored page is current again, so it can be served fresh for another TTL
+            self.response_cache.touch(self._cache_key(url), self._host_key(url))
+            self._note_cache(url, 'not_modified')
+            return stored['fields'], False
+        
         try:
-            logger.info(f"Making {method.upper()} request to: {url}")
-            response = getattr(self.session, method)(url, **kwargs)
-            response.raise_for_status()
-            logger.debug(f"Request successful: {response.status_code}")
-            return response
+            result = self._parse(method_name, response.text, *args)
+        except Exception:
+            self._record_dead_end(url, 'parse_failed')
+            raise
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.response_cache.put_validators(validators_key, etag, last_modified, result)
+        return result, True
+
+    def _note_cache(self, url, status):
+        log = getattr(self._cache_tracking, 'log', None)
+        if log is not None:
+            log[url] = status
+
+    def _host_key(self, url):
+        """Map a URL to the host bucket its concurrency limit is tracked under"""
+        host = (urlparse(url).hostname or '').lower()
+        for known_host in self.host_concurrency:
+            if host == known_host or host.endswith('.' + known_host):
+                return known_host
+        return host
+
+    def _host_slot(self, url):
+        """Return the semaphore limiting in-flight requests to the URL's host"""
+        host = self._host_key(url)
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(DEFAULT_HOST_CONCURRENCY)
+            return self._host_slots[host]
+
+    def _get_executor(self):
+        """Lazily create the worker pool shared by concurrent scrapes"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=sum(self.host_concurrency.values()),
+                    thread_name_prefix='scraper'
+                )
+            return self._executor
+
+    def map_concurrent(self, func, items):
+        """Run func over items on the worker pool, returning results in input order.
+
+        Per-host limits are enforced in _make_request, so callers can submit work
+        for both hosts at once and let each host run at its own concurrency.
+        """
+        items = list(items)
+        if not items:
+            return []
+        return list(self._get_executor().map(func, items))
+
+    def connection_stats(self):
+        """Report how often requests reused a pooled connection instead of opening a new one"""
+        requests_made = 0
+        connections_opened = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_made += pool.num_requests
+                connections_opened += pool.num_connections
+        reused = max(0, requests_made - connections_opened)
+        return {
+            'requests': requests_made,
+            'connections_opened': connections_opened,
+            'reuse_hit_rate': round(reused / requests_made, 3) if requests_made else None
+        }
+
+    def _get_parse_pool(self):
+        """Lazily start the parse worker processes, or return None to parse in the calling thread"""
+        with self._parse_pool_lock:
+            if self._parse_pool is None and self.parse_workers > 0:
+                try:
+                    # spawn, because forking a process that is running fetch threads can deadlock the child
+                    self._parse_pool = ProcessPoolExecutor(
+                        max_workers=self.parse_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    logger.info(f"Started {self.parse_workers} parse worker processes")
+                except (OSError, NotImplementedError) as e:
+                    logger.warning(f"Cannot start parse worker processes, parsing in fetch threads: {e}")
+                    self.parse_workers = 0
+            return self._parse_pool
+
+    def _parse(self, method_name, *args):
+        """Run a _read_* method on the parse workers if there are any, else in this thread.
+
+        If a worker process dies, the pool is dropped (the next parse starts a
+        new one) and this page is parsed in the calling thread instead.
+        """
+        pool = self._get_parse_pool()
+        if pool is None:
+            return getattr(self, method_name)(*args)
+        options = (self.parser.name, self.targeted_parse, self.fast_extract)
+        try:
+            return pool.submit(_parse_in_worker, options, method_name, *args).result()
+        except BrokenProcessPool as e:
+            logger.warning(f"Parse worker pool broke, parsing in this thread and restarting it: {e}")
+            self._discard_parse_pool(pool)
+            return getattr(self, method_name)(*args)
+
+    def _discard_parse_pool(self, pool):
+        """Forget a broken parse pool, unless another thread already replaced it"""
+        with self._parse_pool_lock:
+            if self._parse_pool is pool:
+                self._parse_pool = None
+        pool.shutdown(wait=False)
+
+    def cache_stats(self):
+        """Report response cache hits per tier, misses and stores"""
+        return self.response_cache.stats()
+
+    def extraction_stats(self):
+        """Report how many GitHub profiles were read by the fast extractor and how often it fell back to the DOM"""
+        with self._extraction_lock:
+            fast = self._extraction_counts['fast']
+            fallback = self._extraction_counts['fallback']
+            return {
+                'fast': fast,
+                'fallback': fallback,
+                'fallback_rate': round(fallback / (fast + fallback), 3) if fast + fallback else None,
+                'fallback_fields': dict(self._fallback_fields)
+            }
+
+    def close(self):
+        """Shut down the worker pools and release pooled connections"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        with self._parse_pool_lock:
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown(wait=True)
+                self._parse_pool = None
+        self.response_cache.close()
+        self.negative_cache.close()
+        self.session.close()
+
+    def _check_deadline(self, url, deadline):
+        if deadline and deadline.expired(MIN_FETCH_BUDGET):
+            logger.warning(f"Deadline reached, not fetching: {url}")
+            raise DeadlineExceeded("Time budget exhausted before the request could be made.")
+
+    def _request_timeout(self, deadline):
+        """(connect, read) timeout for the next request, clipped to the remaining deadline"""
+        if not deadline:
+            return (CONNECT_TIMEOUT, READ_TIMEOUT)
+        remaining = deadline.remaining()
+        return (min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+
+    def _retry_delay(self, attempt, deadline, retry_after=None):
+        """Backoff before the next attempt, or None if it would not fit in the deadline"""
+        delay = self.retry_policy.get_delay(attempt, retry_after)
+        if delay is not None and deadline and delay > deadline.remaining() - MIN_FETCH_BUDGET:
+            return None
+        return delay
+
+    def _make_request(self, url, method='get', deadline=None, validators=None, **kwargs):
+        """Wrapper for making requests with retries, timeouts, proper error handling and logging
+
+        Args:
+            deadline: optional Deadline; no new attempt is started once it is nearly spent
+            validators: optional {'etag', 'last_modified'} from an earlier response; when the
+                page has to be fetched it is requested conditionally and may come back as a 304
+        """
+        host = self._host_key(url)
+        cache_key = None
+        if method == 'get' and not kwargs:
+            cache_key = self._cache_key(url)
+            cached = self.response_cache.get(cache_key, host)
+            if cached is not None:
+                logger.info(f"Serving {url} from the {cached.cache_status} cache")
+                self._note_cache(url, cached.cache_status)
+                return cached
+        attempt = 0
+        try:
+            while True:
+                self._check_deadline(url, deadline)
+                if not self.circuit_breaker.allow(host):
+                    logger.warning(f"Circuit open for {host}, skipping request to: {url}")
+                    raise CircuitOpenError(f"{HOST_NAMES.get(host, host)} is temporarily unavailable. Please try again later.")
+
+                logger.info(f"Making {method.upper()} request to: {url}")
+                max_wait = deadline.remaining() - MIN_FETCH_BUDGET if deadline else None
+                if self.rate_limiter.acquire(host, max_wait=max_wait) is None:
+                    self.circuit_breaker.release_trial(host)
+                    logger.warning(f"Deadline would pass waiting for a {host} rate limit token, not fetching: {url}")
+                    raise DeadlineExceeded("Time budget exhausted before the request could be made.")
+                try:
+                    self._check_deadline(url, deadline)
+                    with self._host_slot(url):
+                        request_kwargs = dict(kwargs)
+                        if validators:
+                            headers = dict(request_kwargs.get('headers') or {})
+                            if validators.get('etag'):
+                                headers['If-None-Match'] = validators['etag']
+                            if validators.get('last_modified'):
+                                headers['If-Modified-Since'] = validators['last_modified']
+                            request_kwargs['headers'] = headers
+                        request_kwargs.setdefault('timeout', self._request_timeout(deadline))
+                        response = getattr(self.session, method)(url, **request_kwargs)
+                except DeadlineExceeded:
+                    self.circuit_breaker.release_trial(host)
+                    raise
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    self.circuit_breaker.record_failure(host)
+                    delay = self._retry_delay(attempt, deadline)
+                    if delay is None:
+                        logger.error(f"Request to {url} failed after {attempt + 1} attempts: {e}")
+                        raise UpstreamUnavailableError(f"{HOST_NAMES.get(host, host)} is temporarily unavailable. Please try again later.") from e
+                    logger.warning(f"Request to {url} failed ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                except requests.exceptions.RequestException:
+                    self.circuit_breaker.release_trial(host)
+                    raise
+
+                if self.retry_policy.is_retryable(response.status_code):
+                    retry_after = self.retry_policy.parse_retry_after(response.headers.get('Retry-After'))
+                    self.circuit_breaker.record_failure(host, retry_after)
+                    delay = self._retry_delay(attempt, deadline, retry_after)
+                    if delay is not None and not self.circuit_breaker.is_open(host):
+                        logger.warning(f"Got {response.status_code} from {url}, retrying in {delay:.1f}s")
+                        time.sleep(delay)
+                        attempt += 1
+                        continue
+                else:
+                    self.circuit_breaker.record_success(host)
+
+                response.raise_for_status()
+                logger.debug(f"Request successful: {response.status_code}")
+                if cache_key is not None and response.status_code == 200:
+                    self.response_cache.put(cache_key, host, url, response.text)
+                    self._note_cache(url, 'miss')
+                return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {str(e)}")
             if isinstance(e, requests.exceptions.HTTPError):
                 if e.response.status_code == 429:
                     logger.warning("Rate limit exceeded")
-                    raise ValueError("GitHub rate limit exceeded. Please try again later.")
+                    raise RateLimitError(f"{HOST_NAMES.get(host, host)} rate limit exceeded. Please try again later.")
                 elif e.response.status_code == 404:
                     logger.warning("Resource not found")
+                    self._record_dead_end(url, 'not_found')
                     raise ValueError("The requested profile was not found.")
+                elif e.response.status_code >= 500:
+                    raise UpstreamUnavailableError(f"{HOST_NAMES.get(host, host)} is temporarily unavailable. Please try again later.") from e
             raise
 
     def load_cookies(self):
@@ -61,6 +586,7 @@ class GithubScraper:
             if cookies_str:
                 cookies_dict = json.loads(cookies_str)
                 self.session.cookies.update(cookies_dict)
+                self._cache_variant = self._cookies_fingerprint(cookies_dict)
                 logger.info("GitHub cookies loaded successfully")
             else:
                 logger.warning("No GITHUB_COOKIES found in environment")
@@ -69,55 +595,141 @@ class GithubScraper:
         except Exception as e:
             logger.error(f"Error loading cookies: {e}")
 
-    def get_github_link(self, stackoverflow_url: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    def get_github_link(self, stackoverflow_url: str, deadline: Optional[Deadline] = None,
+                        raise_errors: bool = False) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
         """Extract GitHub profile link, description, Twitter link, and profile text from Stack Overflow profile
         
+        Failures are logged and returned as a tuple of Nones, which looks like a
+        profile without links; with raise_errors they are raised instead.
+        
         Returns:
             tuple: (github_url, description, twitter_url, profile_text)
         """
         try:
-            response = self._make_request(stackoverflow_url)
-            if not response:
-                return None, None, None, None
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Get Stack Overflow description
-            description = None
-            about_me = soup.find('div', {'id': 'user-about-me'})
-            if about_me:
-                description = about_me.get_text(strip=True)
-
-            # Get Twitter link
-            twitter_url = None
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                if 'twitter.com' in href:
-                    twitter_url = href
-                    break
-
-            # Get GitHub link
-            github_url = None
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                if 'github.com' in href and not href.endswith('.png'):
-                    github_url = href
-                    if not github_url.startswith('http'):
-                        github_url = f"https://{github_url}"
-                    break
-
-            # Get profile text
-            profile_text = None
-            profile_section = soup.find('div', {'id': 'mainbar-full'})
-            if profile_section:
-                profile_text = profile_section.get_text(strip=True, separator=' ')
-
-            return github_url, description, twitter_url, profile_text
+            github_link, _ = self._fetch_and_read(stackoverflow_url, deadline, '_read_github_link')
+            if not github_link[0]:
+                self._record_dead_end(stackoverflow_url, 'no_github_link')
+            return tuple(github_link)
 
+        except (TransientHostError, DeadlineExceeded):
+            # Let callers defer the work instead of recording a failure
+            raise
         except Exception as e:
             logger.error(f"Error extracting GitHub link from {stackoverflow_url}: {e}")
+            if raise_errors:
+                raise
             return None, None, None, None
 
+    def _read_github_link(self, page):
+        return self._extract_github_link(self.parser.parse(page))
+
+    def _classify_links(self, soup) -> Dict[str, Optional[str]]:
+        """Classify every anchor on a Stack Overflow profile in a single pass.
+
+        Returns the first matching href for each category:
+            twitter: first link mentioning twitter.com
+            github_link: first link mentioning github.com that is not an image
+            github_any: first link mentioning github.com in any letter case
+            github_profile: first GitHub link passing _is_github_profile_url
+            linkedin, blog, website: the user's own (rel="me") external links
+        """
+        links = dict.fromkeys(LINK_CATEGORIES)
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            if not href:
+                continue
+            lowered = href.lower()
+
+            if links['twitter'] is None and 'twitter.com' in href:
+                links['twitter'] = href
+
+            if 'github.com' in lowered:
+                if links['github_any'] is None:
+                    links['github_any'] = href
+                if links['github_link'] is None and 'github.com' in href and not href.endswith('.png'):
+                    links['github_link'] = href
+                if links['github_profile'] is None and self._is_github_profile_url(href):
+                    links['github_profile'] = href
+                continue
+
+            # Only the user's own profile links count as their website or blog
+            if 'me' not in (link.get('rel') or []) or not lowered.startswith(('http://', 'https://', '//')):
+                continue
+            host = (urlparse(href if not href.startswith('//') else 'https:' + href).hostname or '').lower()
+            if any(host == h or host.endswith('.' + h) for h in STACKEXCHANGE_HOSTS):
+                continue
+            if 'linkedin.com' in host:
+                category = 'linkedin'
+            elif 'blog' in lowered or any(host == h or host.endswith('.' + h) for h in BLOG_HOSTS):
+                category = 'blog'
+            elif 'twitter.com' in host or host in ('x.com', 'www.x.com'):
+                continue
+            else:
+                category = 'website'
+            if links[category] is None:
+                links[category] = href
+        return links
+
+    def _extract_github_link(self, soup, links=None) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """Pull (github_url, description, twitter_url, profile_text) out of a parsed Stack Overflow page"""
+        links = links or self._classify_links(soup)
+
+        # Get Stack Overflow description
+        description = None
+        about_me = soup.find('div', {'id': 'user-about-me'})
+        if about_me:
+            description = about_me.get_text(strip=True)
+
+        # Get Twitter link
+        twitter_url = links['twitter']
+
+        # Get GitHub link
+        github_url = links['github_link']
+        if github_url and not github_url.startswith('http'):
+            github_url = f"https://{github_url}"
+
+        # Get profile text
+        profile_text = None
+        profile_section = soup.find('div', {'id': 'mainbar-full'})
+        if profile_section:
+            profile_text = profile_section.get_text(strip=True, separator=' ')
+
+        return github_url, description, twitter_url, profile_text
+
+    def get_stackoverflow_profile(self, so_url: str, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a Stack Overflow profile once, returning everything
+        get_github_link and get_stackoverflow_info would produce separately
+
+        Returns:
+            dict: github_url, description, twitter_url and profile_text as returned by
+            get_github_link, plus 'stackoverflow_info' as returned by get_stackoverflow_info
+        """
+        try:
+            logger.info(f"Processing Stack Overflow: {so_url}")
+
+            so_profile, _ = self._fetch_and_read(so_url, deadline, '_read_stackoverflow_profile')
+            if not so_profile['github_url']:
+                self._record_dead_end(so_url, 'no_github_link')
+            return so_profile
+
+        except (TransientHostError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            logger.error(f"Error getting Stack Overflow profile from {so_url}: {e}")
+            return None
+
+    def _read_stackoverflow_profile(self, page):
+        soup = self.parser.parse(page)
+        links = self._classify_links(soup)
+        github_url, description, twitter_url, profile_text = self._extract_github_link(soup, links)
+        return {
+            'github_url': github_url,
+            'description': description,
+            'twitter_url': twitter_url,
+            'profile_text': profile_text,
+            'stackoverflow_info': self._extract_stackoverflow_info(soup, links)
+        }
+
     def _is_github_profile_url(self, url):
         """Check if URL is likely a GitHub profile URL"""
         if not url:
@@ -157,327 +769,446 @@ class GithubScraper:
         
         return url if self._is_github_profile_url(url) else None
 
-    def get_github_info(self, github_url):
-        """Extract comprehensive profile information from GitHub page"""
+    def _github_memo_key(self, github_url):
+        """Key GitHub profile URLs that differ only by scheme, www, case, trailing slash or query the same"""
+        url = self._clean_github_url(github_url)
+        if not url:
+            return None
+        url = url.lower().split('://', 1)[-1]
+        if url.startswith('www.'):
+            url = url[len('www.'):]
+        return url, url.split('/')[-1]
+
+    def get_github_info(self, github_url, deadline=None, memo=None, raise_errors=False):
+        """Extract comprehensive profile information from GitHub page.
+
+        With a RunMemo, each canonical profile is fetched at most once per run.
+        Failures are returned as (None, None) unless raise_errors is set.
+        """
+        key = self._github_memo_key(github_url) if memo is not None else None
+        if key is not None:
+            email, profile_info = memo.get_or_compute(key, lambda: self.get_github_info(github_url, deadline, raise_errors=raise_errors))
+            if profile_info is not None:
+                # Report the URL this caller asked for, as an unmemoized call would
+                profile_info = dict(profile_info, github_url=github_url, username=github_url.split('/')[-1])
+            return email, profile_info
+        
         try:
             logger.info(f"Processing GitHub: {github_url}")
-            time.sleep(1)
-            
-            response = self.session.get(github_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
             
-            # Get basic profile info
-            profile_info = {}
-            
-            # Store the GitHub profile URL
-            profile_info['github_url'] = github_url
-            
-            # Get name and username
-            profile_info['name'] = soup.find('span', {'itemprop': 'name'}).text.strip() if soup.find('span', {'itemprop': 'name'}) else None
-            profile_info['username'] = github_url.split('/')[-1]
-            
-            # Get email
-            email_elem = soup.find('li', {'itemprop': 'email'})
-            profile_info['email'] = email_elem.text.strip() if email_elem else None
-            
-            # Get location
-            location_elem = soup.find('li', {'itemprop': 'homeLocation'})
-            profile_info['location'] = location_elem.text.strip() if location_elem else None
-            
-            # Get company
-            company_elem = soup.find('li', {'itemprop': 'worksFor'})
-            profile_info['company'] = company_elem.text.strip() if company_elem else None
-            
-            # Get website
-            website_elem = soup.find('li', {'itemprop': 'url'})
-            profile_info['website'] = website_elem.find('a')['href'] if website_elem and website_elem.find('a') else None
-            
-            # Get followers and following counts
-            followers_elem = soup.find('span', {'class': 'text-bold color-fg-default'}, text=lambda t: t and 'followers' in t.lower())
-            following_elem = soup.find('span', {'class': 'text-bold color-fg-default'}, text=lambda t: t and 'following' in t.lower())
-            
-            profile_info['followers'] = followers_elem.text.strip().split()[0] if followers_elem else '0'
-            profile_info['following'] = following_elem.text.strip().split()[0] if following_elem else '0'
-            
-            # Get bio/profile text
-            profile_elem = soup.find('div', {'class': 'p-note user-profile-bio'})
-            profile_info['bio'] = profile_elem.text.strip() if profile_elem else None
-            
-            # Get contribution info
-            contributions_elem = soup.find('h2', {'class': 'f4 text-normal mb-2'})
-            profile_info['contributions'] = contributions_elem.text.strip() if contributions_elem else None
-            
-            # Get pinned repositories if any
-            pinned_repos = []
-            pinned_section = soup.find('div', {'class': 'js-pinned-items-reorder-container'})
-            if pinned_section:
-                for repo in pinned_section.find_all('div', {'class': 'pinned-item-list-item-content'}):
-                    repo_name = repo.find('span', {'class': 'repo'})
-                    repo_desc = repo.find('p', {'class': 'pinned-item-desc'})
-                    if repo_name:
-                        pinned_repos.append({
-                            'name': repo_name.text.strip(),
-                            'description': repo_desc.text.strip() if repo_desc else None
-                        })
-            profile_info['pinned_repositories'] = pinned_repos
+            (profile_info, fallback_fields), parsed = self._fetch_and_read(github_url, deadline, '_read_github_page', github_url)
+            if parsed:
+                self._record_extraction(github_url, fallback_fields)
             
             return profile_info['email'], profile_info
             
+        except (TransientHostError, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"Error getting GitHub info: {e}")
+            if raise_errors:
+                raise
             return None, None
 
-    def get_stackoverflow_info(self, so_url):
+    def _read_github_page(self, page, github_url):
+        """Extract profile_info from a GitHub page.
+
+        Returns (profile_info, fallback_fields): fallback_fields is None when the
+        fast extractor is disabled, else the fields that forced the DOM path.
+        """
+        fallback_fields = None
+        if self.fast_extract:
+            profile_info, fallback_fields = self._fast_extract_github_info(page, github_url)
+            if profile_info is not None:
+                return profile_info, fallback_fields
+        soup = self.parser.parse(
+            page,
+            parse_only=GITHUB_PROFILE_STRAINER if self.targeted_parse else None
+        )
+        return self._extract_github_info(soup, github_url), fallback_fields
+
+    def _record_extraction(self, github_url, fallback_fields):
+        if fallback_fields is None:
+            return
+        with self._extraction_lock:
+            if fallback_fields:
+                self._extraction_counts['fallback'] += 1
+                self._fallback_fields.update(fallback_fields)
+            else:
+                self._extraction_counts['fast'] += 1
+        if fallback_fields:
+            logger.info(f"Fell back to DOM extraction for {github_url}: {', '.join(sorted(fallback_fields))}")
+
+    def _fast_extract_github_info(self, page, github_url) -> Tuple[Optional[Dict[str, Any]], list]:
+        """Build profile_info without a DOM.
+
+        Returns (profile_info, fallback_fields); profile_info is None when the
+        fields in fallback_fields have to be read through the DOM.
+        """
+        fields, ambiguous = extract_github_profile_fields(page)
+        missing = {field for field in FAST_EXTRACT_REQUIRED_FIELDS if fields.get(field) is None}
+        if ambiguous or missing:
+            return None, sorted(ambiguous | missing)
+        
+        # Same keys in the same order as _extract_github_info
+        return {
+            'github_url': github_url,
+            'name': fields['name'],
+            'username': github_url.split('/')[-1],
+            'email': fields['email'],
+            'location': fields['location'],
+            'company': fields['company'],
+            'website': fields['website'],
+            'followers': fields['followers'],
+            'following': fields['following'],
+            'bio': fields['bio'],
+            'contributions': fields['contributions'],
+            'pinned_repositories': fields['pinned_repositories']
+        }, []
+
+    def _extract_github_info(self, soup, github_url) -> Dict[str, Any]:
+        """Pull profile fields out of a parsed GitHub profile page"""
+        # Get basic profile info
+        profile_info = {}
+        
+        # Store the GitHub profile URL
+        profile_info['github_url'] = github_url
+        
+        # Get name and username
+        profile_info['name'] = soup.find('span', {'itemprop': 'name'}).text.strip() if soup.find('span', {'itemprop': 'name'}) else None
+        profile_info['username'] = github_url.split('/')[-1]
+        
+        # Get email
+        email_elem = soup.find('li', {'itemprop': 'email'})
+        profile_info['email'] = email_elem.text.strip() if email_elem else None
+        
+        # Get location
+        location_elem = soup.find('li', {'itemprop': 'homeLocation'})
+        profile_info['location'] = location_elem.text.strip() if location_elem else None
+        
+        # Get company
+        company_elem = soup.find('li', {'itemprop': 'worksFor'})
+        profile_info['company'] = company_elem.text.strip() if company_elem else None
+        
+        # Get website
+        website_elem = soup.find('li', {'itemprop': 'url'})
+        profile_info['website'] = website_elem.find('a')['href'] if website_elem and website_elem.find('a') else None
+        
+        # Get followers and following counts
+        followers_elem = soup.find('span', {'class': 'text-bold color-fg-default'}, text=lambda t: t and 'followers' in t.lower())
+        following_elem = soup.find('span', {'class': 'text-bold color-fg-default'}, text=lambda t: t and 'following' in t.lower())
+        
+        profile_info['followers'] = followers_elem.text.strip().split()[0] if followers_elem else '0'
+        profile_info['following'] = following_elem.text.strip().split()[0] if following_elem else '0'
+        
+        # Get bio/profile text
+        profile_elem = soup.find('div', {'class': 'p-note user-profile-bio'})
+        profile_info['bio'] = profile_elem.text.strip() if profile_elem else None
+        
+        # Get contribution info
+        contributions_elem = soup.find('h2', {'class': 'f4 text-normal mb-2'})
+        profile_info['contributions'] = contributions_elem.text.strip() if contributions_elem else None
+        
+        # Get pinned repositories if any
+        pinned_repos = []
+        pinned_section = soup.find('div', {'class': 'js-pinned-items-reorder-container'})
+        if pinned_section:
+            for repo in pinned_section.find_all('div', {'class': 'pinned-item-list-item-content'}):
+                repo_name = repo.find('span', {'class': 'repo'})
+                repo_desc = repo.find('p', {'class': 'pinned-item-desc'})
+                if repo_name:
+                    pinned_repos.append({
+                        'name': repo_name.text.strip(),
+                        'description': repo_desc.text.strip() if repo_desc else None
+                    })
+        profile_info['pinned_repositories'] = pinned_repos
+        
+        return profile_info
+
+    def get_stackoverflow_info(self, so_url, deadline=None):
         """Extract comprehensive profile information from Stack Overflow page"""
         try:
             logger.info(f"Processing Stack Overflow: {so_url}")
-            time.sleep(1)
-            
-            response = self.session.get(so_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Method 1: Check for GitHub link in social links section
-            github_link = soup.find('a', href=lambda href: href and 'github.com' in href.lower())
-            
-            # Method 2: Check for GitHub link in user profile links
-            if not github_link:
-                user_links = soup.find_all('a', {'rel': 'me'})
-                for link in user_links:
-                    if 'github.com' in link.get('href', '').lower():
-                        github_link = link
-                        break
-            
-            # Method 3: Check for GitHub link in the about me section
-            if not github_link:
-                about_me = soup.find('div', {'class': 'about-me'})
-                if about_me:
-                    github_links = about_me.find_all('a', href=lambda href: href and 'github.com' in href.lower())
-                    if github_links:
-                        github_link = github_links[0]
-            
-            # Method 4: Look for any link containing github.com in the entire profile
-            if not github_link:
-                all_links = soup.find_all('a', href=lambda href: href and 'github.com' in href.lower())
-                for link in all_links:
-                    # Filter out links that are not likely to be profile links
-                    href = link.get('href', '').lower()
-                    if 'gist.github.com' not in href and '/issues/' not in href and '/pull/' not in href:
-                        github_link = link
-                        break
-            
-            github_url = None
-            if github_link:
-                url = github_link.get('href')
-                # Clean up the URL
-                if url:
-                    # Remove any query parameters or fragments
-                    url = url.split('?')[0].split('#')[0]
-                    # Ensure it's a profile URL
-                    if 'github.com' in url and not any(x in url for x in ['/issues/', '/pull/', '/commit/', '/releases/', '/tags/']):
-                        logger.info(f"Found GitHub URL: {url}")
-                        github_url = url
-            
-            # Get other Stack Overflow info
-            stats = {}
-            
-            # Get reputation
-            rep_elem = soup.find('div', {'class': 'fs-title'})
-            stats['reputation'] = rep_elem.text.strip() if rep_elem else None
             
-            # Get reach and other stats
-            reach_elem = soup.find('div', {'class': 'fc-black-500'}, string=lambda t: t and 'reached' in t.lower())
-            stats['reached'] = reach_elem.find_parent().find('div', {'class': 'fs-title'}).text.strip() if reach_elem else None
-            
-            answers_elem = soup.find('div', {'class': 'fc-black-500'}, string=lambda t: t and 'answers' in t.lower())
-            stats['answers'] = answers_elem.find_parent().find('div', {'class': 'fs-title'}).text.strip() if answers_elem else None
-            
-            questions_elem = soup.find('div', {'class': 'fc-black-500'}, string=lambda t: t and 'questions' in t.lower())
-            stats['questions'] = questions_elem.find_parent().find('div', {'class': 'fs-title'}).text.strip() if questions_elem else None
-            
-            # Get profile description
-            desc_elem = soup.find('div', {'class': 'profile-about'})
-            description = desc_elem.text.strip() if desc_elem else None
-            
-            return {
-                'github_url': github_url,
-                'stats': stats,
-                'description': description
-            }
+            so_info, _ = self._fetch_and_read(so_url, deadline, '_read_stackoverflow_info')
+            return so_info
             
+        except (TransientHostError, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"Error getting Stack Overflow info: {e}")
             return None
 
+    def _read_stackoverflow_info(self, page):
+        return self._extract_stackoverflow_info(self.parser.parse(page))
+
+    def _extract_stackoverflow_info(self, soup, links=None) -> Dict[str, Any]:
+        """Pull GitHub link, stats, description and profile links out of a parsed Stack Overflow page"""
+        links = links or self._classify_links(soup)
+
+        # The first link mentioning github.com wins, then it must look like a profile
+        github_link = links['github_any']
+        
+        github_url = None
+        if github_link:
+            url = github_link
+            # Clean up the URL
+            if url:
+                # Remove any query parameters or fragments
+                url = url.split('?')[0].split('#')[0]
+                # Ensure it's a profile URL
+                if 'github.com' in url and not any(x in url for x in ['/issues/', '/pull/', '/commit/', '/releases/', '/tags/']):
+                    logger.info(f"Found GitHub URL: {url}")
+                    github_url = url
+        
+        # Get other Stack Overflow info
+        stats = {}
+        
+        # Get reputation
+        rep_elem = soup.find('div', {'class': 'fs-title'})
+        stats['reputation'] = rep_elem.text.strip() if rep_elem else None
+        
+        # Get reach and other stats
+        reach_elem = soup.find('div', {'class': 'fc-black-500'}, string=lambda t: t and 'reached' in t.lower())
+        stats['reached'] = reach_elem.find_parent().find('div', {'class': 'fs-title'}).text.strip() if reach_elem else None
+        
+        answers_elem = soup.find('div', {'class': 'fc-black-500'}, string=lambda t: t and 'answers' in t.lower())
+        stats['answers'] = answers_elem.find_parent().find('div', {'class': 'fs-title'}).text.strip() if answers_elem else None
+        
+        questions_elem = soup.find('div', {'class': 'fc-black-500'}, string=lambda t: t and 'questions' in t.lower())
+        stats['questions'] = questions_elem.find_parent().find('div', {'class': 'fs-title'}).text.strip() if questions_elem else None
+        
+        # Get profile description
+        desc_elem = soup.find('div', {'class': 'profile-about'})
+        description = desc_elem.text.strip() if desc_elem else None
+        
+        return {
+            'github_url': github_url,
+            'stats': stats,
+            'description': description,
+            'github': links['github_profile'],
+            'twitter': links['twitter'],
+            'linkedin': links['linkedin'],
+            'website': links['website'],
+            'blog': links['blog']
+        }
+
     def sanitize_csv_field(self, field):
         """Sanitize field for CSV writing"""
-        if field is None:
-            return "Not found"
-        return str(field).replace('\n', ' ').replace('\r', ' ').strip()
+        return sanitize_csv_field(field)
+
+    def _profile_record(self, index, row, memo=None, retry_dead_ends=False):
+        """Scrape one input row and return its output record, or an error record on failure.
 
-    def process_profiles(self, csv_path):
-        """Main processing function"""
+        With retry_dead_ends, a link recorded as a dead end is forgotten and fetched again.
+        """
         try:
-            # Read the CSV file
-            df = pd.read_csv(csv_path)
+            if retry_dead_ends:
+                self._forget_dead_end(row['Stack Overflow Link'])
+            elif self.dead_end(row['Stack Overflow Link']):
+                raise ValueError("Known dead end, not fetched")
+            
+            # Get GitHub URL and Stack Overflow info from a single profile fetch
+            so_profile = self.get_stackoverflow_profile(row['Stack Overflow Link']) or {}
+            github_url = so_profile.get('github_url')
+            description = so_profile.get('description')
+            twitter_url = so_profile.get('twitter_url')
+            profile_text = so_profile.get('profile_text')
+            so_info = so_profile.get('stackoverflow_info')
+            
+            # Get GitHub info, if the profile links to GitHub at all
+            github_info = self.get_github_info(github_url, memo=memo) if github_url else (None, None)
+            
+            if github_info[1] and so_info:
+                stats = so_info.get('stats', {})
+                return {
+                    'stackoverflow_link': row['Stack Overflow Link'],
+                    'stackoverflow_description': description,
+                    'github_url': github_url,
+                    'email': github_info[0],
+                    'bio': github_info[1].get('bio'),
+                    'name': github_info[1].get('name'),
+                    'username': github_info[1].get('username'),
+                    'location': github_info[1].get('location'),
+                    'company': github_info[1].get('company'),
+                    'website': github_info[1].get('website'),
+                    'followers': github_info[1].get('followers'),
+                    'following': github_info[1].get('following'),
+                    'contributions': github_info[1].get('contributions'),
+                    'pinned_repositories': github_info[1].get('pinned_repositories'),
+                    'stackoverflow_reputation': stats.get('reputation'),
+                    'stackoverflow_reached': stats.get('reached'),
+                    'stackoverflow_answers': stats.get('answers'),
+                    'stackoverflow_questions': stats.get('questions'),
+                    'stackoverflow_bio': so_info.get('description'),
+                    'stackoverflow_location': so_info.get('location'),
+                    'stackoverflow_website': so_info.get('website'),
+                    'stackoverflow_twitter': twitter_url,
+                    'stackoverflow_github': so_info.get('github'),
+                    'stackoverflow_blog': so_info.get('blog'),
+                    'stackoverflow_profile_text': profile_text,
+                    'error': False
+                }
+            logger.error(f"Failed to get GitHub info for row {index + 1}")
+            
+        except Exception as e:
+            logger.error(f"Error processing row {index + 1}: {e}")
+        
+        return {
+            'stackoverflow_link': row.get('Stack Overflow Link'),
+            'stackoverflow_description': row.get('Stack Overflow Description'),
+            'error': True
+        }
+
+    @staticmethod
+    def _unique_rows(rows, link_key, done_links, skipped):
+        """Yield input rows whose Stack Overflow link was neither done before nor seen earlier in the input.
+
+        Counts what was left out in skipped under 'done' and 'duplicate'.
+        """
+        seen = set()
+        for row, _ in rows:
+            key = link_key(row.get('Stack Overflow Link'))
+            if key in done_links:
+                skipped['done'] += 1
+                continue
+            if key in seen:
+                skipped['duplicate'] += 1
+                continue
+            seen.add(key)
+            yield row
+
+    def _ordered_map(self, func, items, workers):
+        """Yield func(*item) for each item in input order, running up to `workers` at once.
+
+        Finished results wait in a reorder buffer until every earlier item is done,
+        and at most 2 * workers items are in flight or buffered, so memory stays
+        bounded however long the input is.
+        """
+        items = iter(items)
+        if workers <= 1:
+            for item in items:
+                yield func(*item)
+            return
+        
+        window = 2 * workers
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='profiles') as executor:
+            pending = {}
+            buffer = {}
+            next_submit = next_yield = 0
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) + len(buffer) < window:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending[executor.submit(func, *item)] = next_submit
+                    next_submit += 1
+                if not pending and not buffer:
+                    return
+                if next_yield not in buffer:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        buffer[pending.pop(future)] = future.result()
+                while next_yield in buffer:
+                    yield buffer.pop(next_yield)
+                    next_yield += 1
+
+    def process_profiles(self, csv_path, workers=None, start_offset=0, output_path=None,
+                         resume=False, retry_errors=False, output_format=None):
+        """Main processing function.
+
+        Input rows are streamed from csv_path, starting at byte offset start_offset,
+        and scraped by `workers` threads (default SCRAPER_PROFILE_WORKERS) but
+        written in input order through an output sink (csv, jsonl or parquet,
+        default SCRAPER_OUTPUT_FORMAT), which flushes rows in batches.
+        With resume, rows already in output_path are kept and their Stack Overflow
+        links skipped, and error rows are re-scraped only if retry_errors is set,
+        in which case links in the negative cache are fetched again too.
+        """
+        workers = PROFILE_WORKERS if workers is None else workers
+        try:
+            sink_class = get_sink_class(output_format)
             
             # Create output filename
-            timestamp = time.strftime("%y%m%d")
-            output_path = os.path.join(
-                os.path.dirname(csv_path),
-                f'github_results_{timestamp}.csv'
-            )
+            if output_path is None:
+                timestamp = time.strftime("%y%m%d")
+                output_path = os.path.join(
+                    os.path.dirname(csv_path),
+                    f'github_results_{timestamp}.{sink_class.extension}'
+                )
+            
+            # Stack Overflow links are compared by user id where they have one
+            link_key = lambda link: canonical_stackoverflow_url(link) or self.sanitize_csv_field(link)
+            done_links = set()
+            if resume and os.path.exists(output_path):
+                done_links = {
+                    link_key(link)
+                    for link in sink_class.load_checkpoint(output_path, retry_errors)
+                }
+            resuming = resume and os.path.exists(output_path) and os.path.getsize(output_path) > 0
             
             # Process each row
-            with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-                csv_writer = csv.writer(csvfile)
-                
-                # Write header
-                csv_writer.writerow([
-                    'Stack Overflow Link',
-                    'Stack Overflow Description',
-                    'GitHub URL',
-                    'Email',
-                    'Bio',
-                    'Name',
-                    'Username',
-                    'Location',
-                    'Company',
-                    'Website',
-                    'Followers',
-                    'Following',
-                    'Contributions',
-                    'Pinned Repositories',
-                    'Stack Overflow Reputation',
-                    'Stack Overflow Reached',
-                    'Stack Overflow Answers',
-                    'Stack Overflow Questions',
-                    'Stack Overflow Bio',
-                    'Stack Overflow Location',
-                    'Stack Overflow Website',
-                    'Stack Overflow Twitter',
-                    'Stack Overflow GitHub',
-                    'Stack Overflow Blog',
-                    'Stack Overflow Profile Text'
-                ])
+            with sink_class(output_path, append=resuming, flush_rows=OUTPUT_FLUSH_ROWS,
+                            flush_interval=OUTPUT_FLUSH_SECONDS) as sink:
+                done = 0
+                memo = RunMemo()
+                started = time.monotonic()
+                logger.info(f"Processing profiles from {csv_path} with {workers} workers")
+                skipped = Counter()
+                rows = enumerate(self._unique_rows(iter_rows(csv_path, start_offset), link_key, done_links, skipped))
+                # Retrying error rows means fetching links that failed before, dead ends included
+                scrape = lambda index, row: self._profile_record(index, row, memo, retry_dead_ends=retry_errors)
+                for index, record in enumerate(self._ordered_map(scrape, rows, workers)):
+                    sink.write(record)
+                    if not record['error']:
+                        logger.info(f"Processed row {index + 1}: {record['github_url']}")
+                    
+                    done = index + 1
+                    if done % PROGRESS_LOG_EVERY == 0:
+                        elapsed = time.monotonic() - started
+                        logger.info(f"Progress: {done} rows, {done / elapsed if elapsed else 0:.2f} rows/s")
                 
-                for index, row in df.iterrows():
-                    try:
-                        # Get GitHub URL from Stack Overflow
-                        github_url, description, twitter_url, profile_text = self.get_github_link(row['Stack Overflow Link'])
-                        
-                        # Get GitHub info
-                        github_info = self.get_github_info(github_url)
-                        
-                        # Get Stack Overflow info
-                        so_info = self.get_stackoverflow_info(row['Stack Overflow Link'])
-                        
-                        if github_info and so_info:
-                            # Write row to CSV
-                            csv_writer.writerow([
-                                self.sanitize_csv_field(row['Stack Overflow Link']),
-                                self.sanitize_csv_field(description),
-                                self.sanitize_csv_field(github_url),
-                                self.sanitize_csv_field(github_info[0]),
-                                self.sanitize_csv_field(github_info[1].get('bio')),
-                                self.sanitize_csv_field(github_info[1].get('name')),
-                                self.sanitize_csv_field(github_info[1].get('username')),
-                                self.sanitize_csv_field(github_info[1].get('location')),
-                                self.sanitize_csv_field(github_info[1].get('company')),
-                                self.sanitize_csv_field(github_info[1].get('website')),
-                                self.sanitize_csv_field(github_info[1].get('followers')),
-                                self.sanitize_csv_field(github_info[1].get('following')),
-                                self.sanitize_csv_field(github_info[1].get('contributions')),
-                                self.sanitize_csv_field(json.dumps(github_info[1].get('pinned_repositories'))),
-                                self.sanitize_csv_field(so_info.get('stats', {}).get('reputation')),
-                                self.sanitize_csv_field(so_info.get('stats', {}).get('reached')),
-                                self.sanitize_csv_field(so_info.get('stats', {}).get('answers')),
-                                self.sanitize_csv_field(so_info.get('stats', {}).get('questions')),
-                                self.sanitize_csv_field(so_info.get('description')),
-                                self.sanitize_csv_field(so_info.get('location')),
-                                self.sanitize_csv_field(so_info.get('website')),
-                                self.sanitize_csv_field(twitter_url),
-                                self.sanitize_csv_field(so_info.get('github')),
-                                self.sanitize_csv_field(so_info.get('blog')),
-                                self.sanitize_csv_field(profile_text)
-                            ])
-                            csvfile.flush()
-                            
-                            logger.info(f"Processed and saved row {index + 1}: {github_url}")
-                        else:
-                            # Write error row to CSV
-                            csv_writer.writerow([
-                                self.sanitize_csv_field(row['Stack Overflow Link']),
-                                self.sanitize_csv_field(row['Stack Overflow Description']),
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error",
-                                "Error"
-                            ])
-                            csvfile.flush()
-                            logger.error(f"Failed to get GitHub info for row {index + 1}")
-                            continue
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing row {index + 1}: {e}")
-                        # Write error row to CSV
-                        csv_writer.writerow([
-                            self.sanitize_csv_field(row['Stack Overflow Link']),
-                            self.sanitize_csv_field(row['Stack Overflow Description']),
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error",
-                            "Error"
-                        ])
-                        csvfile.flush()
-                        continue
+                elapsed = time.monotonic() - started
+                logger.info(f"Processed {done} rows in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.2f} rows/s)")
             
             logger.info(f"Results saved to {output_path}")
+            logger.info(f"GitHub extraction: {self.extraction_stats()}")
+            logger.info(f"GitHub profile memo: {memo.stats()}")
+            logger.info(f"Response cache: {self.cache_stats()}")
+            if skipped['duplicate']:
+                logger.info(f"Skipped {skipped['duplicate']} rows repeating an earlier Stack Overflow user")
             return output_path
             
         except Exception as e:
             logger.error(f"Error processing profiles: {e}")
             return None
 
+_shared_scraper = None
+_shared_scraper_cookies = None
+_shared_scraper_lock = threading.Lock()
+
+def get_shared_scraper(cookies_str=None):
+    """Return the process-wide scraper, creating it on first use.
+
+    Serverless instances stay warm between invocations, so reusing one scraper
+    keeps its connection pool (and TLS sessions) alive across requests. The
+    scraper is only rebuilt when the cookies JSON it was built from changes.
+    The old one is not closed, since other threads may still be using it; its
+    pools and connections are released once the last of them lets go of it.
+    Raises json.JSONDecodeError if cookies_str is not valid JSON.
+    """
+    global _shared_scraper, _shared_scraper_cookies
+    with _shared_scraper_lock:
+        if _shared_scraper is None or cookies_str != _shared_scraper_cookies:
+            cookies_dict = json.loads(cookies_str) if cookies_str else None
+            if _shared_scraper is not None:
+                logger.info("Cookies changed, rebuilding shared scraper")
+            _shared_scraper = GithubScraper(cookies_dict)
+            _shared_scraper_cookies = cookies_str
+        return _shared_scraper
+
 def set_cookies(cookies_dict):
     """Helper function to set cookies from a dictionary"""
     try:
@@ -494,4 +1225,8 @@ if __name__ == "__main__":
     csv_file = os.path.join(os.path.dirname(__file__),
                            '241211 Non Brazil LatAm Ruby Engineers.csv')
     scraper = GithubScraper()
-    scraper.process_profiles(csv_file)
+    scraper.process_profiles(
+        csv_file,
+        resume=True,
+        retry_errors=os.getenv('SCRAPER_RETRY_ERRORS', '').lower() in ('1', 'true', 'yes')
+    )
@@ -0,0 +1,62 @@
+import logging
+import os
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+logger = logging.getLogger('html_parsers')
+
+class ParserBackend:
+    """Turns raw HTML into a BeautifulSoup tree the extractors can query.
+
+    Backends only differ in speed; every backend must yield the same field values.
+    """
+
+    name = None
+
+    def parse(self, markup, parse_only=None):
+        """Parse markup (str or bytes), optionally keeping only what parse_only matches"""
+        raise NotImplementedError
+
+class HtmlParserBackend(ParserBackend):
+    """Python's built-in html.parser: always available, but the slowest option"""
+
+    name = 'html.parser'
+
+    def parse(self, markup, parse_only=None):
+        return BeautifulSoup(markup, 'html.parser', parse_only=parse_only)
+
+class LxmlParserBackend(ParserBackend):
+    """lxml's C tokenizer and tree builder, several times faster than html.parser"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        if not HAS_LXML:
+            raise ValueError("The lxml parser backend requires the lxml package")
+
+    def parse(self, markup, parse_only=None):
+        return BeautifulSoup(markup, 'lxml', parse_only=parse_only)
+
+PARSER_BACKENDS = {
+    HtmlParserBackend.name: HtmlParserBackend,
+    LxmlParserBackend.name: LxmlParserBackend,
+}
+
+def get_parser_backend(name=None):
+    """Return a parser backend by name.
+
+    Defaults to SCRAPER_PARSER, or lxml when it is installed. If lxml is
+    requested but missing, falls back to html.parser with a warning.
+    """
+    name = name or os.getenv('SCRAPER_PARSER') or (LxmlParserBackend.name if HAS_LXML else HtmlParserBackend.name)
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}', expected one of: {', '.join(PARSER_BACKENDS)}")
+    if name == LxmlParserBackend.name and not HAS_LXML:
+        logger.warning("lxml is not installed, falling back to html.parser")
+        name = HtmlParserBackend.name
+    return PARSER_BACKENDS[name]()
@@ -0,0 +1,286 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger('output_sinks')
+
+# Record fields written by process_profiles, with the CSV header used for each
+OUTPUT_COLUMNS = (
+    ('stackoverflow_link', 'Stack Overflow Link'),
+    ('stackoverflow_description', 'Stack Overflow Description'),
+    ('github_url', 'GitHub URL'),
+    ('email', 'Email'),
+    ('bio', 'Bio'),
+    ('name', 'Name'),
+    ('username', 'Username'),
+    ('location', 'Location'),
+    ('company', 'Company'),
+    ('website', 'Website'),
+    ('followers', 'Followers'),
+    ('following', 'Following'),
+    ('contributions', 'Contributions'),
+    ('pinned_repositories', 'Pinned Repositories'),
+    ('stackoverflow_reputation', 'Stack Overflow Reputation'),
+    ('stackoverflow_reached', 'Stack Overflow Reached'),
+    ('stackoverflow_answers', 'Stack Overflow Answers'),
+    ('stackoverflow_questions', 'Stack Overflow Questions'),
+    ('stackoverflow_bio', 'Stack Overflow Bio'),
+    ('stackoverflow_location', 'Stack Overflow Location'),
+    ('stackoverflow_website', 'Stack Overflow Website'),
+    ('stackoverflow_twitter', 'Stack Overflow Twitter'),
+    ('stackoverflow_github', 'Stack Overflow GitHub'),
+    ('stackoverflow_blog', 'Stack Overflow Blog'),
+    ('stackoverflow_profile_text', 'Stack Overflow Profile Text'),
+)
+OUTPUT_FIELDS = tuple(field for field, _ in OUTPUT_COLUMNS)
+
+def sanitize_csv_field(field):
+    """Sanitize field for CSV writing"""
+    if field is None:
+        return "Not found"
+    return str(field).replace('\n', ' ').replace('\r', ' ').strip()
+
+def truncate_partial_line(path):
+    """Cut off a last line left incomplete by an interruption; return True if one was removed"""
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        data_end = size
+        while data_end > 0:
+            f.seek(max(0, data_end - 4096))
+            chunk = f.read(data_end - f.tell())
+            if chunk.endswith(b'\n'):
+                break
+            newline = chunk.rfind(b'\n')
+            if newline != -1:
+                data_end -= len(chunk) - newline - 1
+                break
+            data_end -= len(chunk)
+        if data_end < size:
+            f.truncate(data_end)
+            return True
+    return False
+
+class OutputSink:
+    """Destination for process_profiles records.
+
+    Records are dicts with the OUTPUT_FIELDS keys plus 'error', which is True
+    for rows that could not be scraped. Written records are buffered and only
+    handed to the file every flush_rows records or flush_interval seconds,
+    whichever comes first, and on close.
+    """
+
+    format = None
+    extension = None
+
+    def __init__(self, path, append=False, flush_rows=50, flush_interval=5.0):
+        self.path = path
+        self.append = append
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+    @classmethod
+    def load_checkpoint(cls, path, retry_errors=False):
+        """Prepare an existing output file for appending and return the Stack Overflow links it covers.
+
+        With retry_errors, error rows are removed from the file so they get
+        scraped again; otherwise they count as done too.
+        """
+        raise NotImplementedError
+
+class LineSink(OutputSink):
+    """Text formats holding one record per line, which can be appended to and resumed"""
+
+    def __init__(self, path, append=False, **kwargs):
+        super().__init__(path, append, **kwargs)
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        if not append:
+            self._start()
+
+    def _start(self):
+        """Write whatever a new file begins with"""
+
+    def _format(self, record):
+        """Return the text of one record, including its line ending"""
+        raise NotImplementedError
+
+    @classmethod
+    def _line_status(cls, line):
+        """Return (stackoverflow_link, is_error) for a record line, or None for other lines"""
+        raise NotImplementedError
+
+    def _write_batch(self, records):
+        self._file.write(''.join(self._format(record) for record in records))
+        self._file.flush()
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+    @classmethod
+    def load_checkpoint(cls, path, retry_errors=False):
+        if truncate_partial_line(path):
+            logger.warning(f"Dropped partially written last row of {path}")
+
+        done = set()
+        errors = 0
+        with open(path, newline='', encoding='utf-8') as f:
+            for line in f:
+                status = cls._line_status(line)
+                if status is None:
+                    continue
+                link, is_error = status
+                if is_error:
+                    errors += 1
+                    if retry_errors:
+                        continue
+                done.add(link)
+
+        if retry_errors and errors:
+            compacted_path = path + '.tmp'
+            with open(path, newline='', encoding='utf-8') as src, \
+                    open(compacted_path, 'w', newline='', encoding='utf-8') as dst:
+                for line in src:
+                    status = cls._line_status(line)
+                    if status is None or not status[1]:
+                        dst.write(line)
+            os.replace(compacted_path, path)
+
+        logger.info(f"Resuming {path}: {len(done)} rows done, {errors} error rows{' to retry' if retry_errors else ''}")
+        return done
+
+class CsvSink(LineSink):
+    """The original CSV layout: one sanitized cell per field, pinned repositories as a JSON string"""
+
+    format = 'csv'
+    extension = 'csv'
+
+    def _start(self):
+        self._file.write(self._format_cells([header for _, header in OUTPUT_COLUMNS]))
+
+    @staticmethod
+    def _format_cells(cells):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(cells)
+        return buffer.getvalue()
+
+    def _format(self, record):
+        if record.get('error'):
+            cells = [
+                sanitize_csv_field(record.get('stackoverflow_link')),
+                sanitize_csv_field(record.get('stackoverflow_description')),
+            ] + ["Error"] * 22
+        else:
+            cells = [
+                sanitize_csv_field(json.dumps(record.get(field)) if field == 'pinned_repositories' else record.get(field))
+                for field in OUTPUT_FIELDS
+            ]
+        return self._format_cells(cells)
+
+    @classmethod
+    def _line_status(cls, line):
+        values = next(csv.reader([line]), None)
+        if not values or values[0] == OUTPUT_COLUMNS[0][1]:
+            return None
+        return values[0], len(values) > 2 and values[2] == "Error"
+
+class JsonlSink(LineSink):
+    """Newline-delimited JSON, keeping pinned repositories as nested objects"""
+
+    format = 'jsonl'
+    extension = 'jsonl'
+
+    def _format(self, record):
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+    @classmethod
+    def _line_status(cls, line):
+        if not line.strip():
+            return None
+        record = json.loads(line)
+        return record.get('stackoverflow_link'), bool(record.get('error'))
+
+class ParquetSink(OutputSink):
+    """Columnar Parquet output; every flush becomes one row group. Requires pyarrow."""
+
+    format = 'parquet'
+    extension = 'parquet'
+
+    def __init__(self, path, append=False, **kwargs):
+        if not HAS_PYARROW:
+            raise ValueError("Parquet output requires the pyarrow package: pip install pyarrow")
+        if append:
+            raise ValueError("Parquet output cannot be appended to; write a new file or use csv or jsonl to resume")
+        super().__init__(path, append, **kwargs)
+        fields = [
+            pa.field(field, pa.list_(pa.struct([('name', pa.string()), ('description', pa.string())])))
+            if field == 'pinned_repositories' else pa.field(field, pa.string())
+            for field in OUTPUT_FIELDS
+        ]
+        self._schema = pa.schema(fields + [pa.field('error', pa.bool_())])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def _write_batch(self, records):
+        rows = [
+            {field: record.get(field) for field in self._schema.names}
+            for record in records
+        ]
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+    @classmethod
+    def load_checkpoint(cls, path, retry_errors=False):
+        raise ValueError("Parquet output cannot be resumed; use csv or jsonl output to resume runs")
+
+OUTPUT_SINKS = {
+    CsvSink.format: CsvSink,
+    JsonlSink.format: JsonlSink,
+    ParquetSink.format: ParquetSink,
+}
+
+def get_sink_class(name=None):
+    """Return an output sink class by format name, defaulting to SCRAPER_OUTPUT_FORMAT or csv"""
+    name = (name or os.getenv('SCRAPER_OUTPUT_FORMAT') or CsvSink.format).lower()
+    if name not in OUTPUT_SINKS:
+        raise ValueError(f"Unknown output format '{name}', expected one of: {', '.join(OUTPUT_SINKS)}")
+    if name == ParquetSink.format and not HAS_PYARROW:
+        # Fail before any scraping rather than when the first rows are written
+        raise ValueError("Parquet output requires the pyarrow package: pip install pyarrow")
+    return OUTPUT_SINKS[name]
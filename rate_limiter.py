@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # fcntl is unavailable on Windows
+    fcntl = None
+
+logger = logging.getLogger('rate_limiter')
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst` tokens.
+
+    Callers reserve a token and are told how long to wait for it, so waiting
+    happens outside the lock and works the same for threads and asyncio tasks.
+    """
+
+    def __init__(self, rate, burst):
+        if rate <= 0:
+            raise ValueError("Rate must be a positive number of requests per second")
+        if burst < 1:
+            raise ValueError("Burst size must be at least 1")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.updated = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token and return how many seconds to wait before using it"""
+        with self._lock:
+            self._refill(time.time())
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self):
+        """Give back a token reserved but not used"""
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def acquire(self):
+        """Block the calling thread until a token is available"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """Suspend the calling task until a token is available"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def get_state(self):
+        with self._lock:
+            return {'tokens': self.tokens, 'updated': self.updated}
+
+    def set_state(self, state):
+        with self._lock:
+            self.tokens = min(self.burst, float(state.get('tokens', self.burst)))
+            self.updated = float(state.get('updated', self.updated))
+
+class HostRateLimiter:
+    """One token bucket per host, optionally persisted to a JSON state file.
+
+    With a state file, every reservation is made under an exclusive file lock
+    against the persisted bucket, so back-to-back or overlapping processes
+    (e.g. consecutive cron invocations on a warm instance) share one budget.
+    """
+
+    def __init__(self, limits, state_path=None):
+        """
+        Args:
+            limits: dict mapping host to (requests_per_second, burst)
+            state_path: optional path of the JSON file used to persist bucket state
+        """
+        self.buckets = {
+            host: TokenBucket(rate, burst)
+            for host, (rate, burst) in limits.items()
+        }
+        self.state_path = state_path
+        self._state_lock = threading.Lock()
+
+    @contextmanager
+    def _locked_state(self):
+        """Yield the persisted state dict and write it back on exit"""
+        with self._state_lock:
+            with open(self.state_path, 'a+') as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read() or '{}')
+                    except json.JSONDecodeError:
+                        logger.warning(f"Ignoring corrupt rate limit state in {self.state_path}")
+                        state = {}
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def reserve(self, host):
+        """Reserve a token for host and return the seconds to wait (0 for unlimited hosts)"""
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            return 0.0
+        if not self.state_path:
+            return bucket.reserve()
+        try:
+            with self._locked_state() as state:
+                if host in state:
+                    bucket.set_state(state[host])
+                wait = bucket.reserve()
+                state[host] = bucket.get_state()
+            return wait
+        except OSError as e:
+            logger.error(f"Error persisting rate limit state: {e}")
+            return bucket.reserve()
+
+    def refund(self, host):
+        """Give back a token reserved for host but not used"""
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            return
+        if not self.state_path:
+            bucket.refund()
+            return
+        try:
+            with self._locked_state() as state:
+                if host in state:
+                    bucket.set_state(state[host])
+                bucket.refund()
+                state[host] = bucket.get_state()
+        except OSError as e:
+            logger.error(f"Error persisting rate limit state: {e}")
+            bucket.refund()
+
+    def _reserve_within(self, host, max_wait):
+        wait = self.reserve(host)
+        if max_wait is not None and wait > max_wait:
+            self.refund(host)
+            return None
+        return wait
+
+    def acquire(self, host, max_wait=None):
+        """Block the calling thread until host has a token available.
+
+        Returns the seconds waited, or None without waiting (and without
+        using up a token) if the wait would be longer than max_wait.
+        """
+        wait = self._reserve_within(host, max_wait)
+        if wait:
+            logger.debug(f"Throttling {host} for {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, host, max_wait=None):
+        """Suspend the calling task until host has a token available; see acquire"""
+        wait = self._reserve_within(host, max_wait)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
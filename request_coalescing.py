@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import Future
+
+class RunMemo:
+    """Results remembered for the length of one run, e.g. GitHub profiles by canonical URL.
+
+    A lookup of a key that is still being computed waits for that computation
+    instead of starting its own. Exceptions are passed to the waiters but not
+    remembered, so a later lookup tries again.
+    """
+
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        owner = False
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._futures[key] = Future()
+                owner = True
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not owner:
+            return future.result()
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._futures[key]
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+class SingleFlight:
+    """Lets concurrent callers asking for the same key share one in-flight computation.
+
+    Unlike RunMemo nothing is kept once the computation finishes, so the next
+    call for the key computes afresh.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.merged = 0
+
+    def do(self, key, compute):
+        """Return (result, shared), shared being True when another caller's computation was joined"""
+        leader = False
+        with self._lock:
+            self.requests += 1
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                leader = True
+            else:
+                self.merged += 1
+        if not leader:
+            return future.result(), True
+        try:
+            result = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'merged': self.merged}
@@ -0,0 +1,387 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger('response_cache')
+
+class CachedResponse:
+    """The parts of a requests.Response the extractors use, as stored in the cache"""
+
+    status_code = 200
+    ok = True
+
+    def __init__(self, url, text, headers=None, fetched_at=None, cache_status=None):
+        self.url = url
+        self.text = text
+        self.headers = headers or {}
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        # 'memory' or 'disk' when served from the cache, 'miss' when just fetched
+        self.cache_status = cache_status
+
+    def __bool__(self):
+        return True
+
+    def raise_for_status(self):
+        pass
+
+class ResponseCache:
+    """Two-tier cache of successful GET responses: a bounded in-memory LRU in
+    front of an optional SQLite file, with a time-to-live per host.
+
+    Entries older than their host's TTL are treated as missing. The SQLite
+    file outlives the process, so a warm serverless instance or a re-run
+    of a list can answer repeated lookups without touching the network.
+
+    Separately, and without expiry, it keeps each URL's ETag/Last-Modified
+    validators with the fields extracted from that response, so a stale
+    page can be revalidated and a 304 answered without parsing anything.
+
+    The file is kept bounded: expired responses are deleted and both tables
+    trimmed to their caps, oldest first, when it is opened and every
+    `purge_every` writes.
+    """
+
+    def __init__(self, ttls, default_ttl=0, max_entries=256, path=None,
+                 max_disk_entries=500, max_validators=10000, purge_every=100):
+        """
+        Args:
+            ttls: dict mapping host to seconds a response stays fresh
+            default_ttl: TTL for other hosts; 0 disables caching for them
+            max_entries: responses kept in memory
+            path: SQLite file for the on-disk tier, or None for memory only
+            max_disk_entries: responses kept in the file
+            max_validators: validator rows kept in the file
+            purge_every: writes between purges of the file
+        """
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.max_validators = max_validators
+        self.purge_every = max(1, purge_every)
+        self._writes_since_purge = 0
+        self._memory = OrderedDict()
+        self._validators = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats_counts = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'not_modified': 0}
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS responses ('
+                    'key TEXT PRIMARY KEY, url TEXT, text TEXT, fetched_at REAL)'
+                )
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS validators ('
+                    'key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fields TEXT, stored_at REAL)'
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Response cache at {path} unavailable, caching in memory only: {e}")
+                self._db = None
+            self.purge_expired()
+
+    def ttl(self, host):
+        return self.ttls.get(host, self.default_ttl)
+
+    def _fresh(self, host, fetched_at):
+        return time.time() - fetched_at < self.ttl(host)
+
+    def get(self, key, host):
+        """Return a fresh CachedResponse for key, or None"""
+        if self.ttl(host) <= 0:
+            return None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._fresh(host, entry.fetched_at):
+                    self._memory.move_to_end(key)
+                    self.stats_counts['memory_hits'] += 1
+                    return CachedResponse(entry.url, entry.text, entry.headers, entry.fetched_at, 'memory')
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        'SELECT url, text, fetched_at FROM responses WHERE key = ?', (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading response cache: {e}")
+                    row = None
+                if row is not None and self._fresh(host, row[2]):
+                    entry = CachedResponse(row[0], row[1], fetched_at=row[2])
+                    self._remember(key, entry)
+                    self.stats_counts['disk_hits'] += 1
+                    return CachedResponse(entry.url, entry.text, entry.headers, entry.fetched_at, 'disk')
+
+            self.stats_counts['misses'] += 1
+            return None
+
+    def put(self, key, host, url, text):
+        """Store the body of a successful response fetched just now"""
+        if self.ttl(host) <= 0:
+            return
+        entry = CachedResponse(url, text)
+        with self._lock:
+            self._remember(key, entry)
+            self.stats_counts['stores'] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO responses (key, url, text, fetched_at) VALUES (?, ?, ?, ?)',
+                        (key, url, text, entry.fetched_at)
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing response cache: {e}")
+        self._count_write()
+
+    def touch(self, key, host):
+        """Mark a stored response as fetched just now, after the server answered 304 for it"""
+        if self.ttl(host) <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                try:
+                    row = self._db.execute(
+                        'SELECT url, text FROM responses WHERE key = ?', (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading response cache: {e}")
+                    row = None
+                if row is not None:
+                    entry = CachedResponse(row[0], row[1])
+            if entry is None:
+                return
+            self._remember(key, CachedResponse(entry.url, entry.text, entry.headers, now))
+            if self._db is not None:
+                try:
+                    self._db.execute('UPDATE responses SET fetched_at = ? WHERE key = ?', (now, key))
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing response cache: {e}")
+
+    def get_validators(self, key):
+        """Return {'etag', 'last_modified', 'fields'} stored for key, or None"""
+        with self._lock:
+            entry = self._validators.get(key)
+            if entry is not None:
+                self._validators.move_to_end(key)
+            elif self._db is not None:
+                try:
+                    entry = self._db.execute(
+                        'SELECT etag, last_modified, fields FROM validators WHERE key = ?', (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading cached validators: {e}")
+                if entry is not None:
+                    entry = tuple(entry)
+                    self._remember_validators(key, entry)
+        if entry is None:
+            return None
+        etag, last_modified, fields = entry
+        # Decode on every call so callers never share (and mutate) one copy
+        return {'etag': etag, 'last_modified': last_modified, 'fields': json.loads(fields)}
+
+    def put_validators(self, key, etag, last_modified, fields):
+        """Remember a response's validators with the JSON-serializable fields extracted from it"""
+        entry = (etag, last_modified, json.dumps(fields))
+        with self._lock:
+            self._remember_validators(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO validators (key, etag, last_modified, fields, stored_at) VALUES (?, ?, ?, ?, ?)',
+                        (key, etag, last_modified, entry[2], time.time())
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing cached validators: {e}")
+        self._count_write()
+
+    def record_not_modified(self):
+        with self._lock:
+            self.stats_counts['not_modified'] += 1
+
+    def _remember_validators(self, key, entry):
+        self._validators[key] = entry
+        self._validators.move_to_end(key)
+        while len(self._validators) > self.max_entries:
+            self._validators.popitem(last=False)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _count_write(self):
+        with self._lock:
+            self._writes_since_purge += 1
+            due = self._writes_since_purge >= self.purge_every
+        if due:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """Delete on-disk responses older than the longest TTL, then trim both tables to their caps"""
+        if self._db is None:
+            return
+        cutoff = time.time() - max([self.default_ttl] + list(self.ttls.values()))
+        with self._lock:
+            self._writes_since_purge = 0
+            try:
+                self._db.execute('DELETE FROM responses WHERE fetched_at < ?', (cutoff,))
+                self._db.execute(
+                    'DELETE FROM responses WHERE key NOT IN '
+                    '(SELECT key FROM responses ORDER BY fetched_at DESC LIMIT ?)',
+                    (self.max_disk_entries,)
+                )
+                self._db.execute(
+                    'DELETE FROM validators WHERE key NOT IN '
+                    '(SELECT key FROM validators ORDER BY stored_at DESC LIMIT ?)',
+                    (self.max_validators,)
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Error purging response cache: {e}")
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.stats_counts)
+            counts['memory_entries'] = len(self._memory)
+        lookups = counts['memory_hits'] + counts['disk_hits'] + counts['misses']
+        counts['hit_rate'] = round((counts['memory_hits'] + counts['disk_hits']) / lookups, 3) if lookups else None
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+class NegativeCache:
+    """Remembers URLs known to be dead ends for `ttl` seconds, so they are not fetched again.
+
+    Outcomes are 'no_github_link' (a Stack Overflow profile without a GitHub
+    link), 'not_found' (404) and 'parse_failed'. Entries live in memory and,
+    given a path, in the same kind of SQLite file as ResponseCache, which is
+    purged of expired entries and trimmed to `max_disk_entries` rows when it
+    is opened and every `purge_every` records.
+    """
+
+    OUTCOMES = ('no_github_link', 'not_found', 'parse_failed')
+
+    def __init__(self, ttl, path=None, max_entries=1024, max_disk_entries=10000, purge_every=100):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.purge_every = max(1, purge_every)
+        self._records_since_purge = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = {outcome: 0 for outcome in self.OUTCOMES}
+        self.recorded = 0
+        if path and ttl > 0:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS negative_results ('
+                    'key TEXT PRIMARY KEY, outcome TEXT, recorded_at REAL)'
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Negative cache at {path} unavailable, keeping it in memory only: {e}")
+                self._db = None
+            self.purge_expired()
+
+    def get(self, key):
+        """Return the outcome recorded for key if it has not expired, else None"""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                try:
+                    entry = self._db.execute(
+                        'SELECT outcome, recorded_at FROM negative_results WHERE key = ?', (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading negative cache: {e}")
+                if entry is not None:
+                    entry = tuple(entry)
+                    self._remember(key, entry)
+            if entry is None:
+                return None
+            outcome, recorded_at = entry
+            if time.time() - recorded_at >= self.ttl:
+                self._memory.pop(key, None)
+                return None
+            self._memory.move_to_end(key)
+            self.hits[outcome] = self.hits.get(outcome, 0) + 1
+            return outcome
+
+    def record(self, key, outcome):
+        if self.ttl <= 0:
+            return
+        if outcome not in self.OUTCOMES:
+            raise ValueError(f"Unknown negative cache outcome '{outcome}'")
+        entry = (outcome, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            self.recorded += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO negative_results (key, outcome, recorded_at) VALUES (?, ?, ?)',
+                        (key, outcome, entry[1])
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing negative cache: {e}")
+            self._records_since_purge += 1
+            due = self._records_since_purge >= self.purge_every
+        if due:
+            self.purge_expired()
+
+    def forget(self, key):
+        """Drop the outcome recorded for key, e.g. to retry a URL before its entry expires"""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                try:
+                    self._db.execute('DELETE FROM negative_results WHERE key = ?', (key,))
+                except sqlite3.Error as e:
+                    logger.error(f"Error writing negative cache: {e}")
+
+    def purge_expired(self):
+        """Delete on-disk entries older than the TTL, then trim the table to max_disk_entries"""
+        if self._db is None:
+            return
+        with self._lock:
+            self._records_since_purge = 0
+            try:
+                self._db.execute('DELETE FROM negative_results WHERE recorded_at < ?', (time.time() - self.ttl,))
+                self._db.execute(
+                    'DELETE FROM negative_results WHERE key NOT IN '
+                    '(SELECT key FROM negative_results ORDER BY recorded_at DESC LIMIT ?)',
+                    (self.max_disk_entries,)
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Error purging negative cache: {e}")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'skipped': dict(self.hits), 'recorded': self.recorded}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
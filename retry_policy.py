@@ -0,0 +1,132 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger('retry_policy')
+
+class RetryPolicy:
+    """Decides whether and how long to wait before retrying a failed request.
+
+    429 and 5xx responses (and connection failures) are retried with exponential
+    backoff and full jitter, unless the server sent a Retry-After header, which
+    is honored as long as it stays under retry_after_max.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, max_retries=3, backoff_base=1.0, backoff_max=30.0, retry_after_max=60.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+
+    def is_retryable(self, status_code):
+        return status_code in self.RETRY_STATUSES
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Convert a Retry-After header (seconds or HTTP date) to seconds, or None"""
+        if not value:
+            return None
+        value = value.strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def get_delay(self, attempt, retry_after=None):
+        """Return the seconds to wait before retry number `attempt` (0-based),
+        or None when no further retry should be made"""
+        if attempt >= self.max_retries:
+            return None
+        if retry_after is not None:
+            # Waiting longer than retry_after_max would stall the whole batch
+            return retry_after if retry_after <= self.retry_after_max else None
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+
+    After failure_threshold consecutive failures a host is opened and requests
+    to it are refused for reset_timeout seconds (or longer if the host asked for
+    it via Retry-After). Then a single trial request is let through; its outcome
+    closes the circuit again or re-opens it. Hosts are tracked independently, so
+    one misbehaving host does not block work for the others.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        return self._hosts.setdefault(host, {
+            'failures': 0,
+            'open_until': None,
+            'trial_in_flight': False
+        })
+
+    def allow(self, host):
+        """Return True if a request to host may be attempted now"""
+        with self._lock:
+            state = self._state(host)
+            if state['open_until'] is None:
+                return True
+            if time.time() < state['open_until'] or state['trial_in_flight']:
+                return False
+            # Half-open: let exactly one trial request through
+            state['trial_in_flight'] = True
+            return True
+
+    def record_success(self, host):
+        with self._lock:
+            state = self._state(host)
+            if state['open_until'] is not None:
+                logger.info(f"Circuit for {host} closed")
+            state.update(failures=0, open_until=None, trial_in_flight=False)
+
+    def record_failure(self, host, retry_after=None):
+        with self._lock:
+            state = self._state(host)
+            state['failures'] += 1
+            if state['trial_in_flight'] or state['failures'] >= self.failure_threshold or \
+                    (retry_after is not None and retry_after > self.reset_timeout):
+                cooldown = max(self.reset_timeout, retry_after or 0)
+                state['open_until'] = time.time() + cooldown
+                state['trial_in_flight'] = False
+                logger.warning(f"Circuit for {host} opened for {cooldown:.0f}s after {state['failures']} failures")
+
+    def release_trial(self, host):
+        """Give back a half-open trial slot that ended without a verdict"""
+        with self._lock:
+            self._state(host)['trial_in_flight'] = False
+
+    def is_open(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            return bool(state and state['open_until'] is not None and time.time() < state['open_until'])
+
+    def snapshot(self):
+        """Return a JSON-serializable view of every host's circuit state"""
+        now = time.time()
+        with self._lock:
+            return {
+                host: {
+                    'state': 'closed' if state['open_until'] is None
+                    else 'open' if now < state['open_until'] else 'half_open',
+                    'failures': state['failures'],
+                    'retry_in': round(max(0.0, state['open_until'] - now), 1) if state['open_until'] else 0
+                }
+                for host, state in self._hosts.items()
+            }
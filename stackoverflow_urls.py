@@ -0,0 +1,29 @@
+import re
+
+# Stack Overflow profile URLs in any of the forms found in the inputs: with or
+# without scheme or www, with or without the name slug and trailing path, or
+# the /u/<id> short form
+_PROFILE_URL_RE = re.compile(
+    r'^(?:https?:)?(?://)?(?:www\.)?stackoverflow\.com/(?:users|u)/(\d+)(?=[/?#]|$)',
+    re.IGNORECASE
+)
+
+def stackoverflow_user_id(url):
+    """Return the numeric user id of a Stack Overflow profile URL, or None if url is not one"""
+    if not url:
+        return None
+    match = _PROFILE_URL_RE.match(str(url).strip())
+    return int(match.group(1)) if match else None
+
+def canonical_stackoverflow_url(url):
+    """Return https://stackoverflow.com/users/<id> for a profile URL, or None if url is not one"""
+    user_id = stackoverflow_user_id(url)
+    return f"https://stackoverflow.com/users/{user_id}" if user_id is not None else None
+
+def normalize_stackoverflow_url(url):
+    """Return the canonical form of a profile URL; other URLs only get https:// added if they lack a scheme"""
+    canonical = canonical_stackoverflow_url(url)
+    if canonical:
+        return canonical
+    url = (url or '').strip()
+    return url if url.startswith('http') else f"https://{url}"
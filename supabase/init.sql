@@ -1,14 +1,37 @@
+-- Safe to run again on an existing database: tables are only created when
+-- missing, and the blocks below bring older ones up to date.
+
+-- Numeric user id of a Stack Overflow profile URL, or NULL if it is not one.
+-- Scheme, www, name slug and anything after the id don't matter, so this is the
+-- key profiles are deduplicated and joined on.
+CREATE OR REPLACE FUNCTION stackoverflow_user_id(url TEXT)
+RETURNS INTEGER AS $$
+    SELECT (regexp_match(
+        btrim(url),
+        '^(?:https?:)?(?://)?(?:www\.)?stackoverflow\.com/(?:users|u)/([0-9]+)(?=[/?#]|$)',
+        'i'
+    ))[1]::INTEGER;
+$$ LANGUAGE sql IMMUTABLE;
+
 -- Table to store Stack Overflow profile URLs
-CREATE TABLE stackoverflow_profiles (
+CREATE TABLE IF NOT EXISTS stackoverflow_profiles (
     id SERIAL PRIMARY KEY,
     url TEXT NOT NULL,
+    so_user_id INTEGER GENERATED ALWAYS AS (stackoverflow_user_id(url)) STORED,
+    -- pending, in_progress, done, no_github, failed or duplicate
+    status TEXT NOT NULL DEFAULT 'pending',
+    -- Worker currently holding the row and when its lease runs out
+    claimed_by TEXT,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
 );
 
 -- Table to track scraping progress
-CREATE TABLE scraping_progress (
+CREATE TABLE IF NOT EXISTS scraping_progress (
     id INTEGER PRIMARY KEY,
     current_index INTEGER DEFAULT 0,
+    -- Highest stackoverflow_profiles id handed out by claim_urls
+    last_id INTEGER DEFAULT 0,
     last_updated TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
 );
 
@@ -18,17 +41,19 @@ VALUES (1, 0, NOW())
 ON CONFLICT (id) DO NOTHING;
 
 -- Table to store processed URLs for tracking
-CREATE TABLE processed_urls (
+CREATE TABLE IF NOT EXISTS processed_urls (
     id SERIAL PRIMARY KEY,
     stackoverflow_url TEXT NOT NULL,
+    so_user_id INTEGER GENERATED ALWAYS AS (stackoverflow_user_id(stackoverflow_url)) STORED,
     batch_index INTEGER NOT NULL,
     processed_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
 );
 
 -- Table to store GitHub profile data
-CREATE TABLE github_profiles (
+CREATE TABLE IF NOT EXISTS github_profiles (
     id SERIAL PRIMARY KEY,
     stackoverflow_url TEXT NOT NULL,
+    so_user_id INTEGER GENERATED ALWAYS AS (stackoverflow_user_id(stackoverflow_url)) STORED,
     github_url TEXT,  
     stackoverflow_description TEXT,
     stackoverflow_profile_text TEXT,
@@ -56,31 +81,281 @@ CREATE INDEX IF NOT EXISTS idx_stackoverflow_profiles_url ON stackoverflow_profi
 ALTER TABLE processed_urls DROP CONSTRAINT IF EXISTS processed_urls_stackoverflow_url_key;
 ALTER TABLE processed_urls ADD CONSTRAINT processed_urls_stackoverflow_url_key UNIQUE (stackoverflow_url);
 
--- Function to get unprocessed URLs with limit
-CREATE OR REPLACE FUNCTION get_unprocessed_urls()
-RETURNS TABLE (url TEXT) AS $$
+-- Function to page through unprocessed URLs by id.
+-- Walks the partial index of pending rows from after_id, so a page costs the
+-- same however far into the table it is; pass the last id returned to get the next page.
+DROP FUNCTION IF EXISTS get_unprocessed_urls();
+CREATE OR REPLACE FUNCTION get_unprocessed_urls(after_id INTEGER DEFAULT 0, batch_size INTEGER DEFAULT 40)
+RETURNS TABLE (id INTEGER, url TEXT) AS $$
 BEGIN
     RETURN QUERY
-    SELECT sp.url
+    SELECT sp.id, sp.url
     FROM stackoverflow_profiles sp
-    WHERE NOT EXISTS (
-        SELECT 1
-        FROM processed_urls pu
-        WHERE pu.stackoverflow_url = sp.url
-    )
+    WHERE sp.status = 'pending'
+    AND sp.id > after_id
     ORDER BY sp.id ASC
-    LIMIT 40;  -- Match batch size from code
+    LIMIT batch_size;
 END;
 $$ LANGUAGE plpgsql;
 
--- Function to batch check processed URLs
+-- Function to batch check which URLs are finished (done, no_github or failed),
+-- matching them to profiles by Stack Overflow user id
 CREATE OR REPLACE FUNCTION batch_check_urls(urls TEXT[])
 RETURNS TABLE (stackoverflow_url TEXT) AS $$
 BEGIN
     RETURN QUERY
-    SELECT pu.stackoverflow_url
+    SELECT u.url
+    FROM unnest(urls) AS u(url)
+    WHERE EXISTS (
+        SELECT 1
+        FROM stackoverflow_profiles sp
+        WHERE sp.so_user_id = stackoverflow_user_id(u.url)
+        AND sp.status IN ('done', 'no_github', 'failed')
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Lease columns for databases created before work claiming
+ALTER TABLE stackoverflow_profiles ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE stackoverflow_profiles ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+CREATE INDEX IF NOT EXISTS idx_stackoverflow_profiles_claimed_by ON stackoverflow_profiles (claimed_by);
+
+-- Queue cursor for databases created before keyset claiming
+ALTER TABLE scraping_progress ADD COLUMN IF NOT EXISTS last_id INTEGER DEFAULT 0;
+
+-- Status column for databases created before it, backfilled from processed_urls
+ALTER TABLE stackoverflow_profiles ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'pending';
+ALTER TABLE stackoverflow_profiles DROP CONSTRAINT IF EXISTS stackoverflow_profiles_status_check;
+ALTER TABLE stackoverflow_profiles ADD CONSTRAINT stackoverflow_profiles_status_check
+    CHECK (status IN ('pending', 'in_progress', 'done', 'no_github', 'failed', 'duplicate'));
+UPDATE stackoverflow_profiles sp
+SET status = 'done'
+WHERE sp.status = 'pending'
+AND EXISTS (
+    SELECT 1
     FROM processed_urls pu
-    WHERE pu.stackoverflow_url = ANY(urls);
+    WHERE pu.stackoverflow_url IN (sp.url, 'https://' || sp.url)
+);
+
+-- Partial indexes so finding queued or abandoned work only touches those rows
+CREATE INDEX IF NOT EXISTS idx_stackoverflow_profiles_pending ON stackoverflow_profiles (id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_stackoverflow_profiles_in_progress ON stackoverflow_profiles (lease_expires_at) WHERE status = 'in_progress';
+
+-- Stack Overflow user id keys for databases created before them
+ALTER TABLE stackoverflow_profiles ADD COLUMN IF NOT EXISTS so_user_id INTEGER GENERATED ALWAYS AS (stackoverflow_user_id(url)) STORED;
+ALTER TABLE processed_urls ADD COLUMN IF NOT EXISTS so_user_id INTEGER GENERATED ALWAYS AS (stackoverflow_user_id(stackoverflow_url)) STORED;
+ALTER TABLE github_profiles ADD COLUMN IF NOT EXISTS so_user_id INTEGER GENERATED ALWAYS AS (stackoverflow_user_id(stackoverflow_url)) STORED;
+CREATE INDEX IF NOT EXISTS idx_stackoverflow_profiles_so_user_id ON stackoverflow_profiles (so_user_id);
+CREATE INDEX IF NOT EXISTS idx_processed_urls_so_user_id ON processed_urls (so_user_id);
+
+-- Queued rows repeating an earlier row's user are marked duplicate and never claimed
+UPDATE stackoverflow_profiles sp
+SET status = 'duplicate'
+WHERE sp.status = 'pending'
+AND EXISTS (
+    SELECT 1
+    FROM stackoverflow_profiles earlier
+    WHERE earlier.so_user_id = sp.so_user_id
+    AND earlier.id < sp.id
+);
+
+-- Function to queue new rows for an already known user as duplicates
+CREATE OR REPLACE FUNCTION mark_duplicate_profile()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM stackoverflow_profiles sp
+        WHERE sp.so_user_id = stackoverflow_user_id(NEW.url)
+    ) THEN
+        NEW.status := 'duplicate';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stackoverflow_profiles_mark_duplicate ON stackoverflow_profiles;
+CREATE TRIGGER stackoverflow_profiles_mark_duplicate
+BEFORE INSERT ON stackoverflow_profiles
+FOR EACH ROW EXECUTE FUNCTION mark_duplicate_profile();
+
+-- One GitHub profile row per user, stored under the canonical Stack Overflow URL
+-- the scrapers write. Where there are several, the row with the most fields
+-- filled in is kept, the newest of those on a tie.
+DELETE FROM github_profiles gp
+USING (
+    SELECT id,
+        ROW_NUMBER() OVER (
+            PARTITION BY so_user_id
+            ORDER BY num_nonnulls(
+                github_url, stackoverflow_description, stackoverflow_profile_text,
+                twitter_url, email, name, username, location, company, website,
+                followers, following, bio, contributions, raw_data
+            ) DESC, id DESC
+        ) AS row_rank
+    FROM github_profiles
+    WHERE so_user_id IS NOT NULL
+) ranked
+WHERE gp.id = ranked.id
+AND ranked.row_rank > 1;
+UPDATE github_profiles gp
+SET stackoverflow_url = 'https://stackoverflow.com/users/' || gp.so_user_id
+WHERE gp.so_user_id IS NOT NULL
+AND gp.stackoverflow_url <> 'https://stackoverflow.com/users/' || gp.so_user_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_github_profiles_so_user_id ON github_profiles (so_user_id);
+
+-- Function to claim up to batch_size pending URLs with an id above after_id.
+-- Rows locked by a concurrent claim are skipped rather than waited on, and
+-- claimed rows are in_progress until they finish or their lease expires, so
+-- workers never overlap.
+CREATE OR REPLACE FUNCTION claim_urls_after(worker_id TEXT, batch_size INTEGER, lease_seconds INTEGER, after_id INTEGER)
+RETURNS TABLE (id INTEGER, url TEXT) AS $$
+BEGIN
+    -- Requeue rows whose worker stopped renewing its lease
+    UPDATE stackoverflow_profiles sp
+    SET status = 'pending',
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE sp.status = 'in_progress'
+    AND sp.lease_expires_at < NOW();
+
+    RETURN QUERY
+    UPDATE stackoverflow_profiles sp
+    SET status = 'in_progress',
+        claimed_by = worker_id,
+        lease_expires_at = NOW() + make_interval(secs => lease_seconds)
+    WHERE sp.id IN (
+        SELECT c.id
+        FROM stackoverflow_profiles c
+        WHERE c.status = 'pending'
+        AND c.id > after_id
+        ORDER BY c.id ASC
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING sp.id, sp.url;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to claim the next unprocessed URLs for one worker.
+-- Without after_id it continues from the shared cursor in scraping_progress and
+-- moves it past the claimed rows, wrapping around to the start once the end of
+-- the table is reached so released and expired rows behind it are picked up.
+DROP FUNCTION IF EXISTS claim_urls(TEXT, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION claim_urls(worker_id TEXT, batch_size INTEGER DEFAULT 40, lease_seconds INTEGER DEFAULT 120, after_id INTEGER DEFAULT NULL)
+RETURNS TABLE (id INTEGER, url TEXT) AS $$
+DECLARE
+    cursor_id INTEGER := after_id;
+    newest INTEGER;
+    wrapped BOOLEAN := FALSE;
+    claimed RECORD;
+BEGIN
+    IF cursor_id IS NULL THEN
+        SELECT COALESCE(p.last_id, 0) INTO cursor_id FROM scraping_progress p WHERE p.id = 1;
+        cursor_id := COALESCE(cursor_id, 0);
+    END IF;
+
+    FOR claimed IN SELECT * FROM claim_urls_after(worker_id, batch_size, lease_seconds, cursor_id) LOOP
+        id := claimed.id;
+        url := claimed.url;
+        newest := GREATEST(newest, claimed.id);
+        RETURN NEXT;
+    END LOOP;
+
+    IF newest IS NULL AND cursor_id > 0 AND after_id IS NULL THEN
+        wrapped := TRUE;
+        FOR claimed IN SELECT * FROM claim_urls_after(worker_id, batch_size, lease_seconds, 0) LOOP
+            id := claimed.id;
+            url := claimed.url;
+            newest := GREATEST(newest, claimed.id);
+            RETURN NEXT;
+        END LOOP;
+    END IF;
+
+    IF after_id IS NULL AND newest IS NOT NULL THEN
+        UPDATE scraping_progress
+        SET last_id = CASE WHEN wrapped THEN newest ELSE GREATEST(scraping_progress.last_id, newest) END
+        WHERE scraping_progress.id = 1;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to extend the leases a worker still holds; returns how many were extended
+CREATE OR REPLACE FUNCTION extend_leases(worker_id TEXT, lease_seconds INTEGER DEFAULT 120)
+RETURNS INTEGER AS $$
+DECLARE
+    extended INTEGER;
+BEGIN
+    UPDATE stackoverflow_profiles sp
+    SET lease_expires_at = NOW() + make_interval(secs => lease_seconds)
+    WHERE sp.claimed_by = worker_id
+    AND sp.status = 'in_progress'
+    AND sp.lease_expires_at > NOW();
+    GET DIAGNOSTICS extended = ROW_COUNT;
+    RETURN extended;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to give up a worker's claims so unfinished rows can be claimed again right away
+CREATE OR REPLACE FUNCTION release_claims(worker_id TEXT)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE stackoverflow_profiles sp
+    SET status = 'pending',
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE sp.claimed_by = worker_id
+    AND sp.status = 'in_progress';
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to add to the shared progress counter without a read-modify-write race
+CREATE OR REPLACE FUNCTION advance_progress(processed INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    new_index INTEGER;
+BEGIN
+    UPDATE scraping_progress
+    SET current_index = current_index + processed,
+        last_updated = NOW()
+    WHERE scraping_progress.id = 1
+    RETURNING current_index INTO new_index;
+    RETURN new_index;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to finish a worker's claimed URLs in one call: results is a JSON array
+-- of {url, status} objects. Sets each row's final status, advances the counter,
+-- logs the URLs in processed_urls and returns the new counter.
+CREATE OR REPLACE FUNCTION complete_urls(worker_id TEXT, results JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    new_index INTEGER;
+BEGIN
+    UPDATE stackoverflow_profiles sp
+    SET status = r.status,
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    FROM jsonb_to_recordset(results) AS r(url TEXT, status TEXT)
+    WHERE sp.claimed_by = worker_id
+    AND sp.url = r.url;
+
+    -- Rows for the same users queued concurrently with them need no scrape of their own
+    UPDATE stackoverflow_profiles sp
+    SET status = 'duplicate'
+    FROM jsonb_to_recordset(results) AS r(url TEXT, status TEXT)
+    WHERE sp.so_user_id = stackoverflow_user_id(r.url)
+    AND sp.status = 'pending';
+
+    new_index := advance_progress(jsonb_array_length(results));
+
+    INSERT INTO processed_urls (stackoverflow_url, batch_index, processed_at)
+    SELECT r.url, new_index, NOW()
+    FROM jsonb_to_recordset(results) AS r(url TEXT, status TEXT)
+    ON CONFLICT (stackoverflow_url) DO UPDATE
+    SET batch_index = EXCLUDED.batch_index,
+        processed_at = EXCLUDED.processed_at;
+
+    RETURN new_index;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,51 @@
+import os
+import tempfile
+from csv_stream import iter_rows
+
+ROWS = [
+    {'Stack Overflow Link': 'https://stackoverflow.com/users/1', 'Stack Overflow Description': 'plain'},
+    {'Stack Overflow Link': 'https://stackoverflow.com/users/2', 'Stack Overflow Description': 'two\r\nlines, quoted'},
+    {'Stack Overflow Link': 'https://stackoverflow.com/users/3', 'Stack Overflow Description': 'café'},
+]
+
+def write_csv(path, bom=False, newline='\n'):
+    """Write ROWS the way spreadsheet exports do, returning the byte offset where each row ends"""
+    lines = ['Stack Overflow Link,Stack Overflow Description'] + [
+        f'{row["Stack Overflow Link"]},"{row["Stack Overflow Description"]}"' for row in ROWS
+    ]
+    data = b'\xef\xbb\xbf' if bom else b''
+    ends = []
+    for index, line in enumerate(lines):
+        data += (line + newline).encode('utf-8')
+        if index:
+            ends.append(len(data))
+    with open(path, 'wb') as f:
+        f.write(data)
+    return ends
+
+def check_offsets(label, bom, newline):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'profiles.csv')
+        ends = write_csv(path, bom, newline)
+        rows = list(iter_rows(path))
+
+        # The BOM never leaks into the first column name
+        assert [row for row, _ in rows] == ROWS, rows
+        assert [offset for _, offset in rows] == ends, (label, [offset for _, offset in rows], ends)
+
+        # Resuming from any offset yields exactly the rows after it
+        for index, (_, offset) in enumerate(rows):
+            assert [row for row, _ in iter_rows(path, offset)] == ROWS[index + 1:], (label, index)
+        # Offset 0, or one inside the header, starts at the first row
+        assert [row for row, _ in iter_rows(path, 0)] == ROWS
+        assert [row for row, _ in iter_rows(path, 3)] == ROWS
+    print(f"{label}: ok")
+
+def test_iter_rows_offsets():
+    check_offsets("LF", bom=False, newline='\n')
+    check_offsets("BOM", bom=True, newline='\n')
+    check_offsets("CRLF", bom=False, newline='\r\n')
+    check_offsets("BOM and CRLF", bom=True, newline='\r\n')
+
+if __name__ == "__main__":
+    test_iter_rows_offsets()
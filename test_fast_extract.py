@@ -0,0 +1,75 @@
+import os
+from fast_extract import extract_github_profile_fields, FIELDS
+from github_scraper import GithubScraper
+from html_parsers import HtmlParserBackend, LxmlParserBackend, HAS_LXML
+
+GITHUB_URL = "https://github.com/octo"
+
+def load_page():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample-github-profile.html')
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def edge_case_pages(page):
+    """Variants of the sample page that html.parser, lxml and the fast path may read differently"""
+    return {
+        'markup in title': page.replace(
+            '<title>octo (Octo Cat)</title>',
+            '<title><span itemprop="name">Not Octo</span></title>'
+        ),
+        'markup in textarea': page.replace(
+            '<body>',
+            '<body><textarea><li itemprop="email">fake@example.com</li></textarea>'
+        ),
+        'unclosed textarea': page.replace('<body>', '<body><textarea>'),
+        'comment in title': page.replace(
+            '<title>octo (Octo Cat)</title>',
+            '<title>octo <!-- </title><span itemprop="name">x</span> --></title>'
+        ),
+        'markup in CDATA': page.replace(
+            '<body>',
+            '<body><![CDATA[<span itemprop="name">Not Octo</span>]]>'
+        ),
+        'plain CDATA': page.replace('<body>', '<body><![CDATA[ plain ]]>'),
+        'field markup in template': page.replace(
+            '<body>',
+            '<body><template><span itemprop="name">Not Octo</span></template>'
+        ),
+        'other markup in template': page.replace(
+            '<body>',
+            '<body><template><div class="flash"><b>Saved</b></div></template>'
+        ),
+        'markup in declaration': page.replace(
+            '<body>',
+            '<body><!x <span itemprop="name">Not Octo</span>>'
+        ),
+        'markup in processing instruction': page.replace(
+            '<body>',
+            '<body><?x <span itemprop="name">Not Octo</span> ?>'
+        ),
+    }
+
+def check_page(scraper, label, page, expect_fast=False):
+    """Fields the fast path reads with confidence must match every DOM parser"""
+    fields, ambiguous = extract_github_profile_fields(page)
+    if expect_fast:
+        assert not ambiguous, f"{label}: unexpected fallback for {sorted(ambiguous)}"
+    backends = [HtmlParserBackend()] + ([LxmlParserBackend()] if HAS_LXML else [])
+    for backend in backends:
+        dom = scraper._extract_github_info(backend.parse(page), GITHUB_URL)
+        for field in FIELDS:
+            if field not in ambiguous:
+                assert fields[field] == dom[field], (
+                    f"{label}: {field} is {fields[field]!r} from the fast path but {dom[field]!r} from {backend.name}"
+                )
+    print(f"{label}: ok ({len(ambiguous)} fields left to the DOM)")
+
+def test_fast_extract_matches_dom():
+    scraper = GithubScraper()
+    page = load_page()
+    check_page(scraper, 'sample page', page, expect_fast=True)
+    for label, variant in edge_case_pages(page).items():
+        check_page(scraper, label, variant)
+
+if __name__ == "__main__":
+    test_fast_extract_matches_dom()
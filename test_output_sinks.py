@@ -0,0 +1,69 @@
+import csv
+import json
+import os
+import tempfile
+from output_sinks import CsvSink, JsonlSink, OUTPUT_FIELDS, truncate_partial_line
+
+def make_record(user_id, error=False):
+    link = f"https://stackoverflow.com/users/{user_id}"
+    if error:
+        return {'stackoverflow_link': link, 'stackoverflow_description': None, 'error': True}
+    record = {field: None for field in OUTPUT_FIELDS}
+    record.update(stackoverflow_link=link, github_url=f"https://github.com/user{user_id}",
+                  pinned_repositories=[{'name': 'repo', 'description': None}], error=False)
+    return record
+
+def write_interrupted_run(sink_class, path):
+    """Write two good rows and an error row, then part of a fourth row as a crash would leave it"""
+    with sink_class(path) as sink:
+        for record in (make_record(1), make_record(2, error=True), make_record(3), make_record(4)):
+            sink.write(record)
+    with open(path, 'rb+') as f:
+        f.truncate(f.seek(0, os.SEEK_END) - 10)
+
+def read_links(sink_class, path):
+    with open(path, newline='', encoding='utf-8') as f:
+        if sink_class is CsvSink:
+            return [row[0] for row in list(csv.reader(f))[1:]]
+        return [json.loads(line)['stackoverflow_link'] for line in f]
+
+def test_truncate_partial_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'out.txt')
+        with open(path, 'wb') as f:
+            f.write(b'a\nb\n' + b'c' * 10000)
+        assert truncate_partial_line(path)
+        with open(path, 'rb') as f:
+            assert f.read() == b'a\nb\n'
+        # A file ending in a newline, or holding no newline at all, is left complete or emptied
+        assert not truncate_partial_line(path)
+        with open(path, 'wb') as f:
+            f.write(b'partial')
+        assert truncate_partial_line(path)
+        assert os.path.getsize(path) == 0
+    print("truncate_partial_line: ok")
+
+def test_resume_after_truncated_line():
+    for sink_class in (CsvSink, JsonlSink):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f'out.{sink_class.extension}')
+            write_interrupted_run(sink_class, path)
+
+            # Error rows count as done unless they are retried
+            done = sink_class.load_checkpoint(path)
+            assert done == {f"https://stackoverflow.com/users/{i}" for i in (1, 2, 3)}, done
+
+            # The partial row is gone, so appending continues on a fresh line
+            with sink_class(path, append=True) as sink:
+                sink.write(make_record(4))
+            assert read_links(sink_class, path) == [f"https://stackoverflow.com/users/{i}" for i in (1, 2, 3, 4)]
+
+            # With retry_errors the error row is dropped from the file and not reported as done
+            done = sink_class.load_checkpoint(path, retry_errors=True)
+            assert done == {f"https://stackoverflow.com/users/{i}" for i in (1, 3, 4)}, done
+            assert read_links(sink_class, path) == [f"https://stackoverflow.com/users/{i}" for i in (1, 3, 4)]
+        print(f"{sink_class.format} resume: ok")
+
+if __name__ == "__main__":
+    test_truncate_partial_line()
+    test_resume_after_truncated_line()
@@ -0,0 +1,78 @@
+import time
+from email.utils import formatdate
+from retry_policy import RetryPolicy, CircuitBreaker
+
+HOST = "github.com"
+
+def test_retry_after_handling():
+    policy = RetryPolicy(max_retries=3, backoff_base=1.0, backoff_max=30.0, retry_after_max=60.0)
+    assert policy.parse_retry_after(None) is None
+    assert policy.parse_retry_after("garbage") is None
+    assert policy.parse_retry_after(" 12 ") == 12.0
+    assert policy.parse_retry_after("-5") == 0.0
+
+    # HTTP dates are converted to the seconds left until then
+    in_30s = policy.parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 25 <= in_30s <= 30, in_30s
+    assert policy.parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0
+
+    # A Retry-After within retry_after_max is honored as is, a longer one ends the retries
+    assert policy.get_delay(0, retry_after=12.0) == 12.0
+    assert policy.get_delay(0, retry_after=61.0) is None
+    # No retries are left after max_retries, whatever the server asked for
+    assert policy.get_delay(3, retry_after=1.0) is None
+
+    # Without Retry-After the delay is jittered exponential backoff, capped at backoff_max
+    for attempt in range(3):
+        assert 0 <= policy.get_delay(attempt) <= min(30.0, 2 ** attempt)
+    print("Retry-After handling: ok")
+
+def test_circuit_breaker_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow(HOST)
+
+    # Opens after failure_threshold consecutive failures
+    breaker.record_failure(HOST)
+    assert breaker.allow(HOST)
+    breaker.record_failure(HOST)
+    assert breaker.is_open(HOST)
+    assert not breaker.allow(HOST)
+    assert breaker.snapshot()[HOST]['state'] == 'open'
+
+    # Half-open after reset_timeout: exactly one trial request gets through
+    time.sleep(0.06)
+    assert breaker.snapshot()[HOST]['state'] == 'half_open'
+    assert breaker.allow(HOST)
+    assert not breaker.allow(HOST)
+
+    # A failed trial re-opens the circuit
+    breaker.record_failure(HOST)
+    assert not breaker.allow(HOST)
+
+    # A trial released without a verdict frees the slot for another one
+    time.sleep(0.06)
+    assert breaker.allow(HOST)
+    breaker.release_trial(HOST)
+    assert breaker.allow(HOST)
+
+    # A successful trial closes it and resets the failure count
+    breaker.record_success(HOST)
+    assert breaker.snapshot()[HOST] == {'state': 'closed', 'failures': 0, 'retry_in': 0}
+    breaker.record_failure(HOST)
+    assert breaker.allow(HOST)
+    print("Circuit breaker transitions: ok")
+
+def test_circuit_breaker_long_retry_after():
+    # A Retry-After longer than reset_timeout opens the circuit at once, for that long
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.05)
+    breaker.record_failure(HOST, retry_after=120.0)
+    assert not breaker.allow(HOST)
+    assert breaker.snapshot()[HOST]['retry_in'] > 100
+    # Other hosts are unaffected
+    assert breaker.allow("stackoverflow.com")
+    print("Circuit breaker Retry-After: ok")
+
+if __name__ == "__main__":
+    test_retry_after_handling()
+    test_circuit_breaker_transitions()
+    test_circuit_breaker_long_retry_after()